@@ -0,0 +1,40 @@
+import logging
+import subprocess
+
+from ping3 import ping
+
+logger = logging.getLogger("ICMP RESPONSE")
+
+# Per-host timeout (ms) and retries for fping.
+FPING_TIMEOUT = 500
+FPING_RETRIES = 1
+
+
+def fping_batch(ips, interface=None):
+    """
+    Ping all addresses with a single fping run and return {ip: alive}.
+    fping probes the hosts in parallel and prints the ones that answered,
+    so a batch costs one process instead of a ping3 socket per host.
+    Falls back to ping3 when the fping binary is not installed. Returns
+    None when fping itself failed and the batch has no usable result.
+    """
+    if not ips:
+        return {}
+    command = ['fping', '-a', '-q', '-t', str(FPING_TIMEOUT), '-r', str(FPING_RETRIES)]
+    if interface:
+        command += ['-I', interface]
+    try:
+        result = subprocess.run(command + list(ips), capture_output=True, text=True)
+    except FileNotFoundError:
+        logger.warning("fping is not installed, pinging one host at a time")
+        return {ip: bool(ping(ip, timeout=2, interface=interface)) for ip in ips}
+    alive = set(result.stdout.split())
+    # 0: all up, 1: some down, 2: some addresses were invalid, but the alive
+    # ones are still listed. 3 and up are argument, interface or permission
+    # errors; with nothing on stdout the batch has no result at all.
+    if result.returncode >= 3 and not alive:
+        logger.error("fping failed with exit code %d: %s", result.returncode, result.stderr.strip())
+        return None
+    if result.returncode >= 2:
+        logger.warning("fping exited with code %d: %s", result.returncode, result.stderr.strip())
+    return {ip: ip in alive for ip in ips}
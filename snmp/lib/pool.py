@@ -0,0 +1,36 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def run_bounded(executor, fn, items, limit):
+    """
+    Call fn(item) for every item on the executor, with at most `limit`
+    calls queued or running at a time, and return once all have finished.
+    Items are pulled from the iterable only as slots free up, so a
+    streamed queryset is never buffered whole in the pool's queue.
+    Returns the results of the calls that did not raise.
+    """
+    slots = threading.BoundedSemaphore(limit)
+    results = []
+
+    def done(future):
+        try:
+            if future.exception() is not None:
+                logger.error("Pooled call failed: %s", future.exception())
+            else:
+                results.append(future.result())
+        finally:
+            slots.release()
+
+    for item in items:
+        slots.acquire()
+        executor.submit(fn, item).add_done_callback(done)
+
+    # Holding every slot means every submitted call has finished
+    for _ in range(limit):
+        slots.acquire()
+    for _ in range(limit):
+        slots.release()
+    return results
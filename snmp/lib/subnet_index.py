@@ -0,0 +1,46 @@
+from ipaddress import ip_address, IPv4Network
+
+
+class SubnetIndex:
+    """
+    Longest-prefix-match lookup of Ats rows by IP address.
+
+    Subnets are bucketed by prefix length and keyed by their network
+    address as an integer, so a lookup costs one mask and one dict probe
+    per distinct prefix length instead of a contains_ip() call per Ats.
+    """
+
+    def __init__(self, ats_list):
+        self.buckets = {}
+        for ats in ats_list:
+            if not ats.subnet:
+                continue
+            try:
+                network = IPv4Network(ats.subnet)
+            except ValueError:
+                # Invalid subnet, Ats.contains_ip() never matches it either
+                continue
+            # First Ats wins for a duplicate subnet, as with a linear scan
+            self.buckets.setdefault(network.prefixlen, {}).setdefault(int(network.network_address), ats)
+        self.prefixlens = sorted(self.buckets, reverse=True)
+        # (netmask, bucket) pairs, longest prefix first
+        self.levels = [
+            (int(IPv4Network((0, prefixlen)).netmask), self.buckets[prefixlen])
+            for prefixlen in self.prefixlens
+        ]
+
+    def lookup(self, address):
+        if not address:
+            return None
+        try:
+            address = ip_address(address)
+        except ValueError:
+            return None
+        if address.version != 4:
+            return None
+        address = int(address)
+        for netmask, bucket in self.levels:
+            ats = bucket.get(address & netmask)
+            if ats is not None:
+                return ats
+        return None
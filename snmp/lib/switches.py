@@ -0,0 +1,61 @@
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from ..models import Switch
+
+logger = logging.getLogger(__name__)
+
+
+def create_switches(new_switches, batch_size=500):
+    """
+    Insert new switches together with their history rows. Switch.ip is
+    unique, so when a concurrent run has inserted some of the same
+    addresses first, those are dropped and the rest inserted again.
+    Returns the switches that were created.
+    """
+    if not new_switches:
+        return []
+    try:
+        with transaction.atomic():
+            return bulk_create_with_history(new_switches, Switch, batch_size=batch_size)
+    except IntegrityError:
+        taken = set(
+            Switch.objects.filter(ip__in=[switch.ip for switch in new_switches]).values_list('ip', flat=True)
+        )
+        new_switches = [switch for switch in new_switches if switch.ip not in taken]
+        for switch in new_switches:
+            # Earlier batches of the rolled back insert may have set a pk
+            switch.pk = None
+    try:
+        with transaction.atomic():
+            return bulk_create_with_history(new_switches, Switch, batch_size=batch_size)
+    except IntegrityError as e:
+        logger.warning("Could not create %d switches, left for the next run: %s", len(new_switches), e)
+        return []
+
+
+def save_statuses(alive):
+    """
+    Store the ping results of one batch, given as {ip: alive}. Switches whose
+    status flipped are saved with a history record; the rest only get their
+    check time stamped. Returns the number of switches that flipped.
+    """
+    now = timezone.now()
+    alive_ips = [ip for ip, up in alive.items() if up]
+    down_ips = [ip for ip, up in alive.items() if not up]
+    with transaction.atomic():
+        flipped = list(Switch.objects.filter(
+            Q(ip__in=alive_ips) & ~Q(status=True) | Q(ip__in=down_ips) & ~Q(status=False)
+        ))
+        for switch in flipped:
+            switch.status = alive[switch.ip]
+            switch.last_update = now
+        bulk_update_with_history(flipped, Switch, ['status', 'last_update'], batch_size=500)
+        Switch.objects.filter(ip__in=list(alive)).exclude(
+            pk__in=[switch.pk for switch in flipped]
+        ).update(last_update=now)
+    return len(flipped)
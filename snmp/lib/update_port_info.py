@@ -1,22 +1,225 @@
 from pysnmp.hlapi import *
 from pysnmp import error
+from pysnmp.proto.rfc1905 import NoSuchObject, NoSuchInstance, EndOfMibView
+from pyasn1.type import univ
 import math
-from django.core.paginator import Paginator
+from functools import lru_cache
+from django.core.cache import cache
+from django.db import DatabaseError
 from ..models import Switch, SwitchesPorts, SwitchesNeighbors, Mac
 import logging
+import threading
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+_snmp_local = threading.local()
+
+
+def get_snmp_engine():
+    """
+    Return the SnmpEngine of the calling thread, creating it on first use.
+    Reusing the engine keeps its transport socket and MIB state across
+    requests; engines are not thread-safe, so each thread gets its own.
+    """
+    engine = getattr(_snmp_local, 'engine', None)
+    if engine is None:
+        engine = _snmp_local.engine = SnmpEngine()
+    return engine
+
+
+@lru_cache(maxsize=None)
+def get_community_data(community):
+    """
+    Return a shared CommunityData for the community string. The same few
+    communities are used for every request, so build each one once.
+    """
+    return CommunityData(community)
+
+
 def mw_to_dbm(mw):
+    # 10 * log10(mw / 1000) folded into a single log and a constant offset
     if mw > 0:
-        mw /= 1000
-        dbm = 10 * math.log10(mw)
-        return dbm
+        return 10 * math.log10(mw) - 30
     else:
         return float('nan')
 
 
+def parse_oid(oid):
+    """
+    Turn a dotted OID string ('iso.3.6.1...' or '.1.3.6.1...') into a tuple
+    of ints that pysnmp accepts without parsing. Empty OIDs pass through.
+    """
+    if not oid:
+        return oid
+    return tuple(int(part) for part in oid.replace('iso', '1', 1).split('.') if part)
+
+
+# (TX, RX, SFP vendor, part number) OIDs per switch model.
+MODEL_OIDS = {
+    'MES3500-24S': (
+        '1.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.4',
+        '1.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.5',
+        '1.3.6.1.4.1.890.1.15.3.84.1.1.1.2.25',
+        '1.3.6.1.4.1.890.1.15.3.84.1.1.1.4.25',
+    ),
+    'MES2428': (
+        'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.25.4.1',
+        'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.25.5.1',
+        'iso.3.6.1.4.1.35265.52.1.1.3.1.1.5.25',
+        'iso.3.6.1.4.1.35265.52.1.1.3.1.1.10.25',
+    ),
+    'MES2408': (
+        'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.9.4.1',
+        'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.9.5.1',
+        'iso.3.6.1.4.1.35265.52.1.1.3.1.1.5.9',
+        'iso.3.6.1.4.1.35265.52.1.1.3.1.1.10.9',
+    ),
+    'MES2428B': (
+        'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.25.4.1',
+        'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.25.5.1',
+        'iso.3.6.1.4.1.35265.52.1.1.3.1.1.5.25',
+        'iso.3.6.1.4.1.35265.52.1.1.3.1.1.10.25',
+    ),
+    'MES2408B': (
+        'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.9.4.1',
+        'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.9.5.1',
+        'iso.3.6.1.4.1.35265.52.1.1.3.1.1.5.9',
+        'iso.3.6.1.4.1.35265.52.1.1.3.1.1.10.9',
+    ),
+    'MES3500-24': (
+        'iso.3.6.1.4.1.890.1.5.8.68.117.2.1.7.25.4',
+        'iso.3.6.1.4.1.890.1.5.8.68.117.2.1.7.25.5',
+        'iso.3.6.1.4.1.890.1.5.8.68.117.1.1.3.25',
+        'iso.3.6.1.4.1.890.1.5.8.68.117.1.1.4.25',
+    ),
+    'MES3500-10': (
+        'iso.3.6.1.4.1.890.1.5.8.68.117.2.1.7.9.4',
+        'iso.3.6.1.4.1.890.1.5.8.68.117.2.1.7.9.5',
+        'iso.3.6.1.4.1.890.1.5.8.68.117.1.1.3.9',
+        'iso.3.6.1.4.1.890.1.5.8.68.117.1.1.4.9',
+    ),
+    'GS3700-24HP': (
+        'iso.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.4',
+        'iso.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.5',
+        'iso.3.6.1.4.1.890.1.15.3.84.1.1.1.2.25',
+        'iso.3.6.1.4.1.890.1.15.3.84.1.1.1.3.28',
+    ),
+    'MES1124MB': (
+        'iso.3.6.1.4.1.89.90.1.2.1.3.49.8',
+        'iso.3.6.1.4.1.89.90.1.2.1.3.49.9',
+        'iso.3.6.1.4.1.35265.1.23.53.1.1.1.5',
+        '',
+    ),
+    'MGS3520-28': (
+        'iso.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.4',
+        'iso.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.5',
+        'iso.3.6.1.4.1.890.1.15.3.84.1.1.1.2.25',
+        'iso.3.6.1.4.1.890.1.15.3.84.1.1.1.3.25',
+    ),
+    'SNR-S2985G-24TC': (
+        'iso.3.6.1.4.1.40418.7.100.30.1.1.22.25',
+        'iso.3.6.1.4.1.40418.7.100.30.1.1.17.25',
+        '',
+        '',
+    ),
+    'SNR-S2985G-8T': (
+        'iso.3.6.1.4.1.40418.7.100.30.1.1.22.9',
+        'iso.3.6.1.4.1.40418.7.100.30.1.1.17.9',
+        '',
+        '',
+    ),
+    'SNR-S2982G-24T': (
+        'iso.3.6.1.4.1.40418.7.100.30.1.1.22.25',
+        'iso.3.6.1.4.1.40418.7.100.30.1.1.17.25',
+        '',
+        '',
+    ),
+    'T2600G-28TS': (
+        'iso.3.6.1.4.1.11863.6.96.1.7.1.1.5.49177',
+        'iso.3.6.1.4.1.11863.6.96.1.7.1.1.6.49177',
+        '',
+        '',
+    ),
+    'S3328TP-SI': (
+        'iso.3.6.1.4.1.2011.5.25.31.1.1.3.1.9.67240014',
+        'iso.3.6.1.4.1.2011.5.25.31.1.1.3.1.8.67240014',
+        '',
+        '',
+    ),
+    'S3328TP-EI': (
+        'iso.3.6.1.4.1.2011.5.25.31.1.1.3.1.9.67240014',
+        'iso.3.6.1.4.1.2011.5.25.31.1.1.3.1.8.67240014',
+        '',
+        '',
+    ),
+}
+
+DEFAULT_OIDS = (
+    'iso.3.6.1.4.1.2011.5.14.6.4.1.4.234881088',
+    'iso.3.6.1.4.1.2011.5.14.6.4.1.5.234881088',
+    None,
+    None,
+)
+
+# Parse every OID once at import instead of on each GET
+MODEL_OIDS = {model: tuple(parse_oid(oid) for oid in oids) for model, oids in MODEL_OIDS.items()}
+DEFAULT_OIDS = tuple(parse_oid(oid) for oid in DEFAULT_OIDS)
+
+
+def _centi_dbm(value):
+    return round(float(value), 2) / 100.0
+
+
+def _milli_dbm(value):
+    return round(float(value), 2) / 1000.0
+
+
+def _dbm(value):
+    return round(float(value), 2)
+
+
+def _microwatt(value):
+    return round(mw_to_dbm(float(value)), 2)
+
+
+# Model substrings mapped to the converter for the raw TX/RX readings,
+# checked in order. Models matching none of them report thousandths of dBm.
+SIGNAL_CONVERTERS = (
+    (('3500', 'GS3700', 'MGS3520-28'), _centi_dbm),
+    (('3328', 'T2600G'), _microwatt),
+    (('SNR',), _dbm),
+)
+
+
+def get_signal_converter(model):
+    if not model:
+        return None
+    for markers, converter in SIGNAL_CONVERTERS:
+        if any(marker in model for marker in markers):
+            return converter
+    return _milli_dbm
+
+
+def snmp_value(value):
+    """
+    Convert a pysnmp value to a plain Python value: int for integer
+    types, rendered text otherwise, None when the agent has no such object.
+    """
+    if isinstance(value, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+        return None
+    if isinstance(value, univ.Integer):
+        return int(value)
+    return value.prettyPrint()
+
+
+# SFP vendor and part number only change when the module is swapped, so
+# they are served from the cache for this long instead of polled every cycle.
+STATIC_OID_TTL = 3600
+
+
+def static_cache_key(ip, oid):
+    return 'snmp-static:%s:%s' % (ip, '.'.join(map(str, oid)))
+
 
 class SNMPUpdater:
     def __init__(self, selected_switch, snmp_community):
@@ -28,302 +231,303 @@ class SNMPUpdater:
         self.ip = selected_switch.ip
         self.snmp_community = snmp_community
         self.TX_SIGNAL_OID, self.RX_SIGNAL_OID, self.SFP_VENDOR_OID, self.PART_NUMBER_OID = self.get_snmp_oids()
+        self.convert_signal = get_signal_converter(self.model)
 
     def get_snmp_oids(self):
-        if self.model == 'MES3500-24S':
-            return (
-                '1.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.4',
-                '1.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.5',
-                '1.3.6.1.4.1.890.1.15.3.84.1.1.1.2.25',
-                '1.3.6.1.4.1.890.1.15.3.84.1.1.1.4.25',
-            )
-        elif self.model == 'MES2428':
-            return (
-                'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.25.4.1',
-                'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.25.5.1',
-                'iso.3.6.1.4.1.35265.52.1.1.3.1.1.5.25',
-                'iso.3.6.1.4.1.35265.52.1.1.3.1.1.10.25',
-            )
-        elif self.model == 'MES2408':
-            return (
-                'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.9.4.1',
-                'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.9.5.1',
-                'iso.3.6.1.4.1.35265.52.1.1.3.1.1.5.9',
-                'iso.3.6.1.4.1.35265.52.1.1.3.1.1.10.9',
-            )
-        elif self.model == 'MES2428B':
-            return (
-                'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.25.4.1',
-                'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.25.5.1',
-                'iso.3.6.1.4.1.35265.52.1.1.3.1.1.5.25',
-                'iso.3.6.1.4.1.35265.52.1.1.3.1.1.10.25',
-            )
-        elif self.model == 'MES2408B':
-            return (
-                'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.9.4.1',
-                'iso.3.6.1.4.1.35265.52.1.1.3.2.1.8.9.5.1',
-                'iso.3.6.1.4.1.35265.52.1.1.3.1.1.5.9',
-                'iso.3.6.1.4.1.35265.52.1.1.3.1.1.10.9',
-            )
-        elif self.model == 'MES3500-24':
-            return (
-                'iso.3.6.1.4.1.890.1.5.8.68.117.2.1.7.25.4',
-                'iso.3.6.1.4.1.890.1.5.8.68.117.2.1.7.25.5',
-                'iso.3.6.1.4.1.890.1.5.8.68.117.1.1.3.25',
-                'iso.3.6.1.4.1.890.1.5.8.68.117.1.1.4.25',
-            )
-        elif self.model == 'MES3500-10':
-            return (
-                'iso.3.6.1.4.1.890.1.5.8.68.117.2.1.7.9.4',
-                'iso.3.6.1.4.1.890.1.5.8.68.117.2.1.7.9.5',
-                'iso.3.6.1.4.1.890.1.5.8.68.117.1.1.3.9',
-                'iso.3.6.1.4.1.890.1.5.8.68.117.1.1.4.9',
-            )
-        elif self.model == 'GS3700-24HP':
-            return (
-                'iso.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.4',
-                'iso.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.5',
-                'iso.3.6.1.4.1.890.1.15.3.84.1.1.1.2.25',
-                'iso.3.6.1.4.1.890.1.15.3.84.1.1.1.3.28',
-            )
-        elif self.model == 'MES1124MB':
-            return (
-                'iso.3.6.1.4.1.89.90.1.2.1.3.49.8',
-                'iso.3.6.1.4.1.89.90.1.2.1.3.49.9',
-                'iso.3.6.1.4.1.35265.1.23.53.1.1.1.5',
-                '',
-            )
-        elif self.model == 'MGS3520-28':
-            return (
-                'iso.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.4',
-                'iso.3.6.1.4.1.890.1.15.3.84.1.2.1.6.25.5',
-                'iso.3.6.1.4.1.890.1.15.3.84.1.1.1.2.25',
-                'iso.3.6.1.4.1.890.1.15.3.84.1.1.1.3.25',
-            )
-        elif self.model == 'SNR-S2985G-24TC':
-            return (
-                'iso.3.6.1.4.1.40418.7.100.30.1.1.22.25',
-                'iso.3.6.1.4.1.40418.7.100.30.1.1.17.25',
-                '',
-                '',
-
-            )
-        elif self.model == 'SNR-S2985G-8T':
-            return (
-                'iso.3.6.1.4.1.40418.7.100.30.1.1.22.9',
-                'iso.3.6.1.4.1.40418.7.100.30.1.1.17.9',
-                '',
-                '',
-            )
-        elif self.model == 'SNR-S2982G-24T':
-            return (
-                'iso.3.6.1.4.1.40418.7.100.30.1.1.22.25',
-                'iso.3.6.1.4.1.40418.7.100.30.1.1.17.25',
-                '',
-                '',
-            )
-        elif self.model == 'T2600G-28TS':
-            return (
-                'iso.3.6.1.4.1.11863.6.96.1.7.1.1.5.49177',
-                'iso.3.6.1.4.1.11863.6.96.1.7.1.1.6.49177',
-                '',
-                '',
-            )
-        elif self.model == 'S3328TP-SI':
-            return (
-                'iso.3.6.1.4.1.2011.5.25.31.1.1.3.1.9.67240014',
-                'iso.3.6.1.4.1.2011.5.25.31.1.1.3.1.8.67240014',
-                '',
-                '',
-            )
-        elif self.model == 'S3328TP-EI':
-            return (
-                'iso.3.6.1.4.1.2011.5.25.31.1.1.3.1.9.67240014',
-                'iso.3.6.1.4.1.2011.5.25.31.1.1.3.1.8.67240014',
-                '',
-                '',
-            )
-        else:
-            return ('iso.3.6.1.4.1.2011.5.14.6.4.1.4.234881088',
-                    'iso.3.6.1.4.1.2011.5.14.6.4.1.5.234881088',
-                    None,
-                    None)
-
-    def perform_snmpwalk(self, oid):
+        return MODEL_OIDS.get(self.model, DEFAULT_OIDS)
+
+    def get_many(self, oids):
+        """
+        Fetch several OIDs in a single GET request.
+        Returns a dict mapping each requested OID to its value.
+        """
+        if not oids:
+            return {}
         try:
-            snmp_walk = getCmd(
-                SnmpEngine(),
-                CommunityData(self.snmp_community),
-                UdpTransportTarget((self.ip, 161), timeout=2, retries=2),
-                ContextData(),
-                ObjectType(ObjectIdentity(oid)),
+            errorIndication, errorStatus, errorIndex, varBinds = next(
+                getCmd(
+                    get_snmp_engine(),
+                    get_community_data(self.snmp_community),
+                    UdpTransportTarget((self.ip, 161), timeout=2, retries=2),
+                    ContextData(),
+                    *[ObjectType(ObjectIdentity(oid)) for oid in oids],
+                )
             )
-
-            snmp_response = []
-            for (errorIndication, errorStatus, errorIndex, varBinds) in snmp_walk:
-                if errorIndication:
-                    continue
-                if varBinds:
-                    for varBind in varBinds:
-                        snmp_response.append(str(varBind))
-            return snmp_response
+            # An errorStatus (e.g. noSuchName on SNMPv1) fails the whole request
+            if errorIndication or errorStatus:
+                return {}
+            return {oid: snmp_value(value) for oid, (name, value) in zip(oids, varBinds)}
         except TimeoutError:
-            return []
+            return {}
         except Exception as e:
-            return []
-    
+            return {}
 
     def update_switch_data(self):
-        TX_SIGNAL_raw = self.perform_snmpwalk(self.TX_SIGNAL_OID)
-        RX_SIGNAL_raw = self.perform_snmpwalk(self.RX_SIGNAL_OID)
-
-        if TX_SIGNAL_raw is not None and RX_SIGNAL_raw is not None:
-            TX_SIGNAL = self.extract_value(TX_SIGNAL_raw)
-            RX_SIGNAL = self.extract_value(RX_SIGNAL_raw)
-        else:
-            TX_SIGNAL = None
-            RX_SIGNAL = None
+        static_keys = {
+            oid: static_cache_key(self.ip, oid)
+            for oid in (self.SFP_VENDOR_OID, self.PART_NUMBER_OID) if oid
+        }
+        cached = cache.get_many(list(static_keys.values()))
+        snmp_response = {oid: cached[key] for oid, key in static_keys.items() if key in cached}
+
+        oids = [
+            oid for oid in (self.TX_SIGNAL_OID, self.RX_SIGNAL_OID, self.SFP_VENDOR_OID, self.PART_NUMBER_OID)
+            if oid and oid not in snmp_response
+        ]
+        snmp_response.update(self.get_many(oids))
+        cache.set_many({
+            key: snmp_response[oid] for oid, key in static_keys.items()
+            # Don't pin an empty answer for the whole TTL
+            if key not in cached and snmp_response.get(oid) not in (None, '')
+        }, STATIC_OID_TTL)
+
+        TX_SIGNAL = snmp_response.get(self.TX_SIGNAL_OID)
+        RX_SIGNAL = snmp_response.get(self.RX_SIGNAL_OID)
 
         if self.SFP_VENDOR_OID and self.PART_NUMBER_OID is not None:
-            SFP_VENDOR_raw = self.perform_snmpwalk(self.SFP_VENDOR_OID)
-            PART_NUMBER_raw = self.perform_snmpwalk(self.PART_NUMBER_OID)
-            SFP_VENDOR = self.extract_value(SFP_VENDOR_raw)
-            PART_NUMBER = self.extract_value(PART_NUMBER_raw)
+            SFP_VENDOR = snmp_response.get(self.SFP_VENDOR_OID)
+            PART_NUMBER = snmp_response.get(self.PART_NUMBER_OID)
         else:
             SFP_VENDOR = None
             PART_NUMBER = None
 
         switch = self.selected_switch
-        try:
-            if '3500' in self.model or 'GS3700' in self.model or 'MGS3520-28' in self.model:
-                switch.tx_signal = round(float(TX_SIGNAL), 2) / 100.0 if TX_SIGNAL is not None else None
-                switch.rx_signal = round(float(RX_SIGNAL), 2) / 100.0 if RX_SIGNAL is not None else None
-            elif '3328' in self.model or 'T2600G' in self.model:
-                Tx_SIGNAL = mw_to_dbm(float(TX_SIGNAL))
-                Rx_SIGNAL = mw_to_dbm(float(RX_SIGNAL))
-                switch.tx_signal = round(Tx_SIGNAL, 2) if TX_SIGNAL is not None else None
-                switch.rx_signal = round(Rx_SIGNAL, 2) if RX_SIGNAL is not None else None
-            elif 'SNR' in self.model:
-                switch.tx_signal = round(float(TX_SIGNAL), 2) if TX_SIGNAL is not None else None
-                switch.rx_signal = round(float(RX_SIGNAL), 2) if RX_SIGNAL is not None else None
-            else:
-                switch.tx_signal = round(float(TX_SIGNAL), 2) / 1000.0 if TX_SIGNAL is not None else None
-                switch.rx_signal = round(float(RX_SIGNAL), 2) / 1000.0 if RX_SIGNAL is not None else None
-        except (ValueError, TypeError):
-            switch.tx_signal = None
-            switch.rx_signal = None
+        convert = self.convert_signal
+        switch.tx_signal = None
+        switch.rx_signal = None
+        if convert is None:
+            logger.debug("No signal converter for model %s (%s)", self.model, self.ip)
+        else:
+            try:
+                if TX_SIGNAL is not None:
+                    switch.tx_signal = convert(TX_SIGNAL)
+                if RX_SIGNAL is not None:
+                    switch.rx_signal = convert(RX_SIGNAL)
+            except ValueError:
+                logger.debug("Invalid TX/RX signal values from %s", self.ip)
+                switch.tx_signal = None
+                switch.rx_signal = None
 
         switch.sfp_vendor = SFP_VENDOR if SFP_VENDOR is not None else None
         switch.part_number = PART_NUMBER if PART_NUMBER is not None else None
 
         try:
             switch.save()
-        except Exception as e:
-            print(f"Error saving switch data: {e}")
-
-    def extract_value(self, snmp_response):
-        if snmp_response and len(snmp_response) > 0:
-            value_str = snmp_response[0].split('=')[-1].strip()
-            return value_str if value_str != 'None' else None
-        return None
+        except DatabaseError as e:
+            logger.error("Error saving switch data for %s: %s", self.ip, e)
     
+# ifTable columns polled for every port, walked once per switch.
+PORT_COLUMN_OIDS = {
+    'speed': '.1.3.6.1.2.1.2.2.1.5',
+    'admin_status': '.1.3.6.1.2.1.2.2.1.7',
+    'oper_status': '.1.3.6.1.2.1.2.2.1.8',
+    'discards_in': '.1.3.6.1.2.1.2.2.1.13',
+    'discards_out': '.1.3.6.1.2.1.2.2.1.19',
+}
+PORT_COLUMN_OIDS = {name: parse_oid(oid) for name, oid in PORT_COLUMN_OIDS.items()}
+
+# Per-port OIDs outside ifTable; the port number is appended as the last sub-identifier.
+VLAN_MEMBERSHIP_OID = parse_oid('.1.3.6.1.2.1.17.7.1.4.3.1.2')
+MAC_ADDRESSES_OID = parse_oid('.1.3.6.1.2.1.17.7.1.2.2.1.2')
+DUPLEX_STATUS_OID = parse_oid('.1.3.6.1.2.1.10.7.2.1.19')
+
+# SwitchesPorts fields written by update_port_info_from_snmp.
+PORT_UPDATE_FIELDS = ['speed', 'admin', 'oper', 'discards_in', 'discards_out', 'duplex', 'port_tagged']
+
+PORT_BATCH_SIZE = 256
+
+# Varbinds per GET request when fetching per-port OIDs in bulk.
+SNMP_GET_CHUNK = 20
+
+
 class PortsInfo():
     
     def snmp_get(self, ip, community, oid):
         try:
-            logger.debug(f"Performing SNMP get for OID: {oid}")
+            logger.debug("Performing SNMP get for OID: %s", oid)
             errorIndication, errorStatus, errorIndex, varBinds = next(
-                getCmd(SnmpEngine(),
-                    CommunityData(community),
+                getCmd(get_snmp_engine(),
+                    get_community_data(community),
                     UdpTransportTarget((ip, 161)),
                     ContextData(),
                     ObjectType(ObjectIdentity(oid)))
             )
 
             if errorIndication:
-                logger.error(f"SNMP Get Error: {errorIndication}")
+                logger.error("SNMP Get Error: %s", errorIndication)
                 return None
             elif errorStatus:
                 if isinstance(errorStatus, error.InconsistentValueError):
-                    logger.warning(f"SNMP Get Warning: {errorStatus}")
+                    logger.warning("SNMP Get Warning: %s", errorStatus)
                     # Handle InconsistentValueError gracefully, e.g., skip this OID
                     return None
                 else:
-                    logger.error(f"SNMP Get Status: {errorStatus.prettyPrint()}, Index: {errorIndex}")
+                    logger.error("SNMP Get Status: %s, Index: %s", errorStatus.prettyPrint(), errorIndex)
                     return None
             else:
                 value = varBinds[0][1].prettyPrint()
-                logger.debug(f"SNMP Get Response - Value: {value}")
+                logger.debug("SNMP Get Response - Value: %s", value)
                 return value
         except Exception as e:
-            logger.exception(f"Error during SNMP Get: {e}")
+            logger.exception("Error during SNMP Get: %s", e)
             return None
 
+    def snmp_get_many(self, ip, community, oids):
+        """
+        GET several OIDs, SNMP_GET_CHUNK varbinds per request. Returns a dict
+        mapping each OID to its rendered value, None when the agent has none.
+        """
+        values = {}
+        for start in range(0, len(oids), SNMP_GET_CHUNK):
+            chunk = oids[start:start + SNMP_GET_CHUNK]
+            try:
+                errorIndication, errorStatus, errorIndex, varBinds = next(
+                    getCmd(get_snmp_engine(),
+                        get_community_data(community),
+                        UdpTransportTarget((ip, 161)),
+                        ContextData(),
+                        *[ObjectType(ObjectIdentity(oid)) for oid in chunk])
+                )
+            except Exception as e:
+                logger.exception("Error during SNMP Get: %s", e)
+                continue
 
-    def create_switch_ports(self, switch):
+            if errorIndication:
+                logger.error("SNMP Get Error: %s", errorIndication)
+                continue
+            elif errorStatus:
+                logger.error("SNMP Get Status: %s, Index: %s", errorStatus.prettyPrint(), errorIndex)
+                continue
+            for oid, (name, value) in zip(chunk, varBinds):
+                if isinstance(value, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+                    values[oid] = None
+                else:
+                    values[oid] = value.prettyPrint()
+        return values
+
+    def bulk_walk(self, ip, community, oid):
+        """
+        Walk a table column with GETBULK and return its values keyed by the
+        last sub-identifier (the port index for ifTable columns).
+        """
+        values = {}
+        try:
+            logger.debug("Performing SNMP bulk walk for OID: %s", oid)
+            for errorIndication, errorStatus, errorIndex, varBinds in bulkCmd(
+                    get_snmp_engine(),
+                    get_community_data(community),
+                    UdpTransportTarget((ip, 161)),
+                    ContextData(),
+                    0, 50,
+                    ObjectType(ObjectIdentity(oid)),
+                    lexicographicMode=False):
+                if errorIndication:
+                    logger.error("SNMP Bulk Walk Error: %s", errorIndication)
+                    break
+                elif errorStatus:
+                    logger.error("SNMP Bulk Walk Status: %s, Index: %s", errorStatus.prettyPrint(), errorIndex)
+                    break
+                for name, value in varBinds:
+                    values[int(name[-1])] = value.prettyPrint()
+        except Exception as e:
+            logger.exception("Error during SNMP Bulk Walk: %s", e)
+        return values
+
+    def walk_port_columns(self, switch):
         ip = switch.ip
         community = switch.snmp_community_ro
-
-        # Replace the following with the actual SNMP OIDs for port information
-        port_oids = {
-            'speed': '.1.3.6.1.2.1.2.2.1.5',
-            'duplex': '.1.3.6.1.2.1.10.7.2.1.19',
-            # Add more port-related OIDs as needed
+        return {
+            name: self.bulk_walk(ip, community, oid)
+            for name, oid in PORT_COLUMN_OIDS.items()
         }
 
+    def create_switch_ports(self, switch):
+        ip = switch.ip
+        community = switch.snmp_community_ro
+
         max_ports = switch.model.max_ports
 
-        for port_num in range(1, max_ports + 1):
-            port_speed_oid = f'{port_oids["speed"]}.{port_num}'
-            port_duplex_oid = f'{port_oids["duplex"]}.{port_num}'
+        # Walk each column once instead of issuing a GET per port
+        speeds = self.bulk_walk(ip, community, PORT_COLUMN_OIDS['speed'])
+        duplexes = self.bulk_walk(ip, community, DUPLEX_STATUS_OID)
 
-            # Perform SNMP queries for port information
-            speed = self.snmp_get(ip, community, port_speed_oid)
-            duplex = self.snmp_get(ip, community, port_duplex_oid)
+        new_ports = []
+        for port_num in range(1, max_ports + 1):
+            speed = speeds.get(port_num)
+            duplex = duplexes.get(port_num)
 
             # Set default values for speed if SNMP data is not available
             speed = int(speed) if speed is not None else 0  # Adjust this default value as needed
 
-            # Create SwitchesPorts instance with retrieved data
-            SwitchesPorts.objects.create(
+            # Build SwitchesPorts instance with retrieved data
+            new_ports.append(SwitchesPorts(
                 switch=switch,
                 port=port_num,
                 speed=speed,
                 duplex=int(duplex) if duplex is not None else None,
                 # Add other port fields here
-            )
-            switch.save()
+            ))
+
+        # One INSERT per batch and one switch save instead of two queries per port
+        SwitchesPorts.objects.bulk_create(new_ports, batch_size=PORT_BATCH_SIZE)
+        switch.save()
             
     def update_port_data(self, switch):
-        # Get all ports for the given switch
-        ports = SwitchesPorts.objects.filter(switch=switch)
-
+        # Get all ports for the given switch, loading only what the update reads
+        # and writes; bulk_update would refetch a deferred field port by port
+        ports = SwitchesPorts.objects.filter(switch=switch).only('id', 'switch', 'port', 'pvid', *PORT_UPDATE_FIELDS)
+        columns = self.walk_port_columns(switch)
+        known_macs = set(Mac.objects.filter(switch=switch).values_list('mac', 'vlan'))
+        new_macs = []
+        batch = []
+
+        # Stream the ports and write them back one chunk at a time
+        for port in ports.iterator(chunk_size=PORT_BATCH_SIZE):
+            batch.append(port)
+            if len(batch) >= PORT_BATCH_SIZE:
+                self.update_port_batch(switch, batch, columns, known_macs, new_macs)
+                batch = []
+
+        if batch:
+            self.update_port_batch(switch, batch, columns, known_macs, new_macs)
+        Mac.objects.bulk_create(new_macs, batch_size=500, ignore_conflicts=True)
+
+    def update_port_batch(self, switch, ports, columns, known_macs, new_macs):
+        # VLAN membership and FDB entries are read per port; request them for
+        # the whole batch in a few multi-varbind GETs instead of two per port
+        port_values = self.snmp_get_many(switch.ip, switch.snmp_community_ro, [
+            oid + (port.port,) for port in ports for oid in (VLAN_MEMBERSHIP_OID, MAC_ADDRESSES_OID)
+        ])
         for port in ports:
-            self.update_port_info_from_snmp(switch, port)
+            self.update_port_info_from_snmp(switch, port, columns, known_macs, new_macs, port_values)
+        SwitchesPorts.objects.bulk_update(ports, PORT_UPDATE_FIELDS)
 
-    def update_port_info_from_snmp(self, switch, port):
+    def update_port_info_from_snmp(self, switch, port, columns=None, known_macs=None, new_macs=None, port_values=None):
         ip = switch.ip
         community = switch.snmp_community_ro
 
-        # Define SNMP OIDs for various port information
-        port_oids = {
-            'speed': f'.1.3.6.1.2.1.2.2.1.5.{port.port}',
-            'admin_status': f'.1.3.6.1.2.1.2.2.1.7.{port.port}',
-            'oper_status': f'.1.3.6.1.2.1.2.2.1.8.{port.port}',
-            'vlan_membership': f'.1.3.6.1.2.1.17.7.1.4.3.1.2.{port.port}',
-            'mac_addresses': f'.1.3.6.1.2.1.17.7.1.2.2.1.2.{port.port}',
-            'discards_in': f'.1.3.6.1.2.1.2.2.1.13.{port.port}',
-            'discards_out': f'.1.3.6.1.2.1.2.2.1.19.{port.port}',
-        }
+        # Called for a single port: fetch what update_port_data would pass in
+        # and save the results before returning.
+        standalone = new_macs is None
+        if columns is None:
+            columns = self.walk_port_columns(switch)
+        if known_macs is None:
+            known_macs = set(Mac.objects.filter(switch=switch).values_list('mac', 'vlan'))
+        if new_macs is None:
+            new_macs = []
+        if port_values is None:
+            port_values = self.snmp_get_many(ip, community, [
+                VLAN_MEMBERSHIP_OID + (port.port,), MAC_ADDRESSES_OID + (port.port,)
+            ])
 
         # Perform SNMP queries for port information
-        speed = self.snmp_get(ip, community, port_oids['speed'])
-        admin_status = self.snmp_get(ip, community, port_oids['admin_status'])
-        oper_status = self.snmp_get(ip, community, port_oids['oper_status'])
-        vlan_membership = self.snmp_get(ip, community, port_oids['vlan_membership'])
-        mac_addresses = self.snmp_get(ip, community, port_oids['mac_addresses'])
-        discards_in = self.snmp_get(ip, community, port_oids['discards_in'])
-        discards_out = self.snmp_get(ip, community, port_oids['discards_out'])
+        speed = columns['speed'].get(port.port)
+        admin_status = columns['admin_status'].get(port.port)
+        oper_status = columns['oper_status'].get(port.port)
+        vlan_membership = port_values.get(VLAN_MEMBERSHIP_OID + (port.port,))
+        mac_addresses = port_values.get(MAC_ADDRESSES_OID + (port.port,))
+        discards_in = columns['discards_in'].get(port.port)
+        discards_out = columns['discards_out'].get(port.port)
 
         # Update port data in the database
         port.speed = int(speed) if speed else None
@@ -343,12 +547,12 @@ class PortsInfo():
             mac_list = mac_addresses.split(',')
             for mac_address in mac_list:
                 # Check if the MAC address already exists in the database
-                mac, created = Mac.objects.get_or_create(
-                    switch=switch,
-                    mac=mac_address,
-                    vlan=port.pvid,
-                )
-                if created:
-                    print(f"New MAC address discovered: {mac_address}")
+                if (mac_address, port.pvid) in known_macs:
+                    continue
+                known_macs.add((mac_address, port.pvid))
+                new_macs.append(Mac(switch=switch, mac=mac_address, vlan=port.pvid))
+                logger.debug("New MAC address discovered on %s: %s", switch.ip, mac_address)
 
-        port.save()
\ No newline at end of file
+        if standalone:
+            port.save()
+            Mac.objects.bulk_create(new_macs, ignore_conflicts=True)
@@ -1,19 +1,71 @@
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from simple_history.utils import bulk_update_with_history
 from snmp.models import Switch, Ats
+from snmp.lib.subnet_index import SubnetIndex
+
+# Longest-prefix match done by Postgres: both ip columns are inet, so
+# <<= (is contained by or equals) can use the gist index on ats.subnet.
+ASSIGN_SQL = """
+    UPDATE switches AS s
+    SET branch_id = m.branch_id, ats_id = m.ats_id
+    FROM (
+        SELECT DISTINCT ON (sw.id) sw.id AS switch_id, a.id AS ats_id, a.branch_id, a.name
+        FROM switches AS sw
+        JOIN ats AS a ON sw.ip <<= a.subnet
+        WHERE family(a.subnet) = 4 AND a.subnet = network(a.subnet)
+        ORDER BY sw.id, masklen(a.subnet) DESC, a.id
+    ) AS m
+    WHERE s.id = m.switch_id
+      AND (s.ats_id IS DISTINCT FROM m.ats_id OR s.branch_id IS DISTINCT FROM m.branch_id)
+    RETURNING s.id, m.name
+"""
+
 
 class Command(BaseCommand):
     help = 'Assign switches to branches based on their IP addresses'
 
     def handle(self, *args, **options):
+        if connection.vendor == 'postgresql':
+            assigned = self.assign_in_database()
+        else:
+            assigned = self.assign_in_python()
+
+        # One write for the whole report; OutputWrapper flushes on every call
+        if assigned:
+            self.stdout.write(self.style.SUCCESS('\n'.join(
+                f'Switch {switch_id} assigned to branch {name}' for switch_id, name in assigned
+            )))
+
+    def assign_in_database(self):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(ASSIGN_SQL)
+                assigned = cursor.fetchall()
+            # The UPDATE bypasses save(), so write the history rows it would have
+            Switch.history.bulk_history_create(
+                Switch.objects.filter(id__in=[switch_id for switch_id, name in assigned]),
+                batch_size=1000, update=True,
+            )
+        return assigned
+
+    def assign_in_python(self):
+        # Full rows: every reassignment gets a history record, as switch.save() wrote
         switches = Switch.objects.all()
-        ats = Ats.objects.all()
+        subnets = SubnetIndex(Ats.objects.select_related('branch').filter(subnet__isnull=False))
 
+        assigned = []
+        updated_switches = []
         for switch in switches:
-            switch_ip = switch.ip
-            for branch in ats:
-                if branch.contains_ip(switch_ip):
-                    switch.branch = branch.branch
-                    switch.ats = branch
-                    switch.save()
-                    self.stdout.write(self.style.SUCCESS(f'Switch {switch.id} assigned to branch {branch.name}'))
-                    break
+            branch = subnets.lookup(switch.ip)
+            if branch is None:
+                continue
+            if switch.ats_id == branch.id and switch.branch_id == branch.branch_id:
+                continue
+            switch.branch = branch.branch
+            switch.ats = branch
+            updated_switches.append(switch)
+            assigned.append((switch.id, branch.name))
+
+        bulk_update_with_history(updated_switches, Switch, ['branch', 'ats'], batch_size=1000)
+        return assigned
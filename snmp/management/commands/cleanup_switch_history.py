@@ -0,0 +1,58 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from snmp.models import Switch
+
+
+class Command(BaseCommand):
+    help = 'Delete switch history records older than the given number of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90,
+                            help='Keep history records newer than this many days')
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Number of rows deleted per statement')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size must be a positive number')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        history = Switch.history.model
+        table = connection.ops.quote_name(history._meta.db_table)
+        # Every optics poll saves the switch and adds a history row, so this
+        # table can hold millions of rows. Delete them in chunks, committing
+        # each one, rather than loading them all through the ORM.
+        sql = (
+            f'DELETE FROM {table} WHERE ctid IN '
+            f'(SELECT ctid FROM {table} WHERE history_date < %s LIMIT %s)'
+        )
+
+        total = 0
+        while True:
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute(sql, [cutoff, chunk_size])
+                        deleted = cursor.rowcount
+                else:
+                    # MySQL rejects LIMIT in an IN subquery, so find the id that
+                    # ends the chunk first and delete up to it
+                    expired = history.objects.filter(history_date__lt=cutoff)
+                    last_id = list(
+                        expired.order_by('history_id').values_list('history_id', flat=True)[chunk_size - 1:chunk_size]
+                    )
+                    if last_id:
+                        expired = expired.filter(history_id__lte=last_id[0])
+                    deleted, _ = expired.delete()
+            total += deleted
+            if deleted < chunk_size:
+                break
+
+        if total and connection.vendor == 'postgresql':
+            # Make the freed pages reusable now instead of waiting for autovacuum
+            with connection.cursor() as cursor:
+                cursor.execute(f'VACUUM ANALYZE {table}')
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} switch history records older than {cutoff:%Y-%m-%d}.'))
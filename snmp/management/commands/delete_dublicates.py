@@ -1,27 +1,25 @@
 from django.core.management.base import BaseCommand
-from django.db import connection
+from django.db import transaction
 
-from django.db.models import Count
+from django.db.models import Count, Max
 from snmp.models import Switch
 
 class Command(BaseCommand):
     help = 'Delete duplicate entries from the Switch model'
 
     def handle(self, *args, **options):
-        duplicate_ips = Switch.objects.values('ip').annotate(count=Count('ip')).filter(count__gt=1)
-        duplicate_hostname = Switch.objects.values('hostname').annotate(count=Count('hostname')).filter(count__gt=1)
-
-        # Iterate over duplicate IPs
-        for hostname in duplicate_hostname:
-            hostname = hostname['hostname']
-            
-            # Retrieve duplicate hosts with the same IP
-            duplicate_hosts = Switch.objects.filter(hostname=hostname).order_by('-hostname')[1:]
-
-            # Keep the first instance and delete the duplicates
-            for duplicate_host in duplicate_hosts:
-                duplicate_host.delete()
-        self.stdout.write(self.style.SUCCESS('Duplicates deleted successfully.'))
-
-
-
+        duplicate_hostname = (
+            Switch.objects.filter(hostname__isnull=False)
+            .values('hostname')
+            .annotate(count=Count('id'), keep=Max('id'))
+            .filter(count__gt=1)
+        )
+
+        # Keep the newest switch of every duplicated hostname and delete the
+        # rest in one set-based delete instead of one query per row
+        keep_ids = [row['keep'] for row in duplicate_hostname]
+        hostnames = [row['hostname'] for row in duplicate_hostname]
+        with transaction.atomic():
+            deleted, _ = Switch.objects.filter(hostname__in=hostnames).exclude(id__in=keep_ids).delete()
+
+        self.stdout.write(self.style.SUCCESS(f'Duplicates deleted successfully ({deleted} rows).'))
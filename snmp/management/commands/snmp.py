@@ -1,5 +1,6 @@
 from pysnmp.hlapi import *
 import logging
+from snmp.lib.update_port_info import get_snmp_engine, get_community_data
 
 
 logging.basicConfig(level=logging.INFO)
@@ -8,9 +9,11 @@ logger = logging.getLogger("SNMP RESPONSE")
 
 def perform_snmpwalk(ip, oid, community):
     try:
+        # One engine per thread is reused for every call instead of
+        # building a new one (and its socket) for each OID
         snmp_walk = getCmd(
-            SnmpEngine(),
-            CommunityData(community),
+            get_snmp_engine(),
+            get_community_data(community),
             UdpTransportTarget((ip, 161), timeout=2, retries=2),
             ContextData(),
             ObjectType(ObjectIdentity(oid)),
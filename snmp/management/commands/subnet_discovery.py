@@ -1,40 +1,128 @@
 import nmap
 import logging
-from ipaddress import IPv4Network
+import socket
+import struct
+from ipaddress import IPv4Address, IPv4Network
+from django.core.cache import caches
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from snmp.models import Switch, SwitchModel, Ats
+from snmp.lib.switches import create_switches
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SNMP DISCOVERY")
 
+BULK_SIZE = 500
+# Seconds a probe result is reused by overlapping or repeated scans,
+# across processes through the file-based 'discovery' cache
+REACHABILITY_TTL = 300
+
+
+def reachability_cache_key(ip):
+    return 'discovery-reachable:%s' % ip
+
+
+def int_to_ip(address):
+    return socket.inet_ntoa(struct.pack('!I', address))
+
+
+def scan_hosts(subnet):
+    """
+    Host addresses of the subnet as integers, skipping the first host
+    (the gateway). Only the addresses that survive filtering are turned
+    into strings.
+    """
+    first = int(subnet.network_address) + 2
+    last = int(subnet.broadcast_address)
+    return range(first, last)
+
 class Command(BaseCommand):
     help = 'Auto-discover switches within multiple /25 subnets of 10.101.0.0/16 range using nmap'
 
-    def check_host_reachability(self, ip):
+    def add_arguments(self, parser):
+        parser.add_argument('--max-workers', type=int, default=32,
+                            help='Maximum number of hosts nmap probes in parallel')
+        parser.add_argument('--update-existing', action='store_true',
+                            help='Also re-probe hosts that are already known switches')
+
+    def scan_hosts_reachability(self, hosts, parallelism=32):
+        """
+        Ping-scan all hosts with a single nmap run and return the set of
+        addresses that are up, instead of starting nmap once per host.
+        Returns None when the scan itself failed.
+        """
+        if not hosts:
+            return set()
         try:
             nm = nmap.PortScanner()
-            nm_args = f'-sn {ip}'
-            nm.scan(hosts=ip, arguments=nm_args)
-            return nm[ip].state() == 'up'
+            nm.scan(hosts=' '.join(hosts), arguments=f'-sn -T4 --max-parallelism {parallelism}')
+            return {host for host in nm.all_hosts() if nm[host].state() == 'up'}
         except Exception as e:
-            logger.error(f"Error while checking host {ip} reachability: {e}")
-            return False
-
-    def handle_subnet(self, subnet, models):
-        hosts = [str(host) for host in list(subnet.hosts())[1:]]
-        for ip_address in hosts:
-            is_reachable = self.check_host_reachability(ip_address)
-            if is_reachable:
-                switch, created = Switch.objects.get_or_create(ip=ip_address, snmp_community_ro='eriwpirt', snmp_community_rw='pirteriw')
-                logger.info(f"Processing switch at IP: {ip_address}")
-                switch.save()
-                if switch.save:
+            logger.error(f"Error while checking reachability of {len(hosts)} hosts: {e}")
+            return None
+
+    def handle_subnet(self, subnet, models, max_workers=32, update_existing=False, ats=None):
+        hosts = scan_hosts(subnet)
+        if not hosts:
+            return
+        # One query for the known switches of the subnet. An IN list rather
+        # than a range: ip only compares numerically on a Postgres inet column
+        known = Switch.objects.filter(ip__in=[int_to_ip(address) for address in hosts])
+        existing_switches = {int(IPv4Address(switch.ip)): switch for switch in known}
+        if not update_existing:
+            hosts = [address for address in hosts if address not in existing_switches]
+        hosts = [int_to_ip(address) for address in hosts]
+        existing_switches = {int_to_ip(address): switch for address, switch in existing_switches.items()}
+        keys = {ip_address: reachability_cache_key(ip_address) for ip_address in hosts}
+        cache = caches['discovery']
+        cached = cache.get_many(keys.values())
+        to_probe = [ip_address for ip_address in hosts if keys[ip_address] not in cached]
+        up = self.scan_hosts_reachability(to_probe, max_workers)
+        # A failed scan says nothing about the hosts, so it is not cached
+        probed = {ip_address: ip_address in up for ip_address in to_probe} if up is not None else {}
+        cache.set_many({keys[ip_address]: is_reachable for ip_address, is_reachable in probed.items()}, REACHABILITY_TTL)
+
+        reachable = [ip_address for ip_address in hosts if cached.get(keys[ip_address], probed.get(ip_address))]
+        # One summary per subnet; most of a /25 is usually empty, and a
+        # warning per dead host drowned out everything else
+        logger.info(f"{subnet}: {len(reachable)} of {len(hosts)} hosts reachable")
+        if reachable:
+            logger.info(f"Processing switches at: {', '.join(reachable)}")
+
+        # All probes for the subnet are done, so its writes commit together
+        with transaction.atomic():
+            # Another discovery run may be writing the same rows; skip those
+            # instead of waiting on them or overwriting its update.
+            rediscovered = [existing_switches[ip_address].pk for ip_address in reachable if ip_address in existing_switches]
+            locked = set(
+                Switch.objects.select_for_update(skip_locked=True)
+                .filter(pk__in=rediscovered).values_list('pk', flat=True)
+            )
+
+            new_switches = []
+            for ip_address in reachable:
+                switch = existing_switches.get(ip_address)
+                if switch is None:
+                    new_switches.append(Switch(
+                        ip=ip_address, snmp_community_ro='eriwpirt', snmp_community_rw='pirteriw',
+                        ats=ats, branch_id=ats.branch_id if ats else None,
+                    ))
+                elif switch.pk in locked:
+                    # Nothing but the timestamp changes, so don't rewrite the whole row
+                    switch.save(update_fields=['last_update'])
                     logger.info(f"Save switch with IP: {ip_address}")
-            else:
-                logger.warning(f"Host {ip_address} is not reachable.")
+                else:
+                    logger.debug(f"Switch {ip_address} is locked by another worker, skipping")
+
+            if new_switches:
+                # Another run may have inserted some of these IPs meanwhile
+                created = create_switches(new_switches, batch_size=BULK_SIZE)
+                logger.info(f"Created {len(created)} switches in {subnet}")
 
-    def process_subnets(self):
-        ats_subnets = Ats.objects.values_list('subnet', flat=True).order_by('-pk')
+    def process_subnets(self, max_workers=32, update_existing=False):
+        # Each scanned range comes from an Ats row, so new switches can take
+        # their ats and branch from it instead of being matched afterwards.
+        ats_subnets = Ats.objects.filter(subnet__isnull=False).only('id', 'subnet', 'branch').order_by('-pk')
         models = SwitchModel.objects.all()
         # subnet_str = "10.47.64.0/19"
         # subnet = IPv4Network(subnet_str)
@@ -43,17 +131,17 @@ class Command(BaseCommand):
         # for sub in subnets:
         #     print(f'Converted subnet: {sub}')
         #     self.handle_subnet(sub, models)
-        for subnet_str in ats_subnets:
-            subnet = IPv4Network(subnet_str)
+        for ats in ats_subnets:
+            subnet = IPv4Network(ats.subnet)
             # Change the new_prefix to a value larger than the original prefix (e.g., 26)
             subnets = list(subnet.subnets(new_prefix=25))
             for sub in subnets:
-                self.handle_subnet(sub, models)
+                self.handle_subnet(sub, models, max_workers, update_existing, ats)
 
 
     def handle(self, *args, **options):
         logger.info("Starting SNMP discovery process...")
-        self.process_subnets()
+        self.process_subnets(options.get('max_workers', 32), options.get('update_existing', False))
 
 def main():
     Command().handle()
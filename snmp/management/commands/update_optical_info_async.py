@@ -465,7 +465,7 @@ class Command(BaseCommand):
         loop = asyncio.get_event_loop()
 
         while True:
-            selected_switches = Switch.objects.filter(status=True).order_by('-model')
+            selected_switches = Switch.objects.filter(status=True).select_related('model').order_by('-model')
 
             with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
                 futures = []
@@ -3,14 +3,17 @@
 import asyncio
 import logging
 import math
+from concurrent.futures import ThreadPoolExecutor
 from ipaddress import IPv4Network, IPv4Address, ip_address as parse_ip_address
 
 from django.core.management.base import BaseCommand
 from pysnmp.hlapi import (
-    SnmpEngine, CommunityData, UdpTransportTarget, ContextData, ObjectType, ObjectIdentity, nextCmd
+    CommunityData, UdpTransportTarget, ContextData, ObjectType, ObjectIdentity, nextCmd
 )
 # Убедитесь, что путь импорта модели Switch корректен для вашей структуры проекта
 from snmp.models import Switch
+from snmp.lib.pool import run_bounded
+from snmp.lib.update_port_info import get_snmp_engine
 
 # Настройка базового логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -134,7 +137,7 @@ class SNMPUpdater:
         snmp_response_values = []
         try:
             iterator = nextCmd( # Используем nextCmd для walk
-                SnmpEngine(),
+                get_snmp_engine(), # Движок потока переиспользуется, а не создаётся на каждый OID
                 CommunityData(self.snmp_community, mpModel=0), # mpModel=0 для SNMPv1/v2c
                 UdpTransportTarget((self.ip, 161), timeout=2, retries=2),
                 ContextData(),
@@ -385,6 +388,54 @@ class Command(BaseCommand):
             default='snmp2netread', # Значение по умолчанию
             help='SNMP community string to use.'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=32, # Количество параллельно опрашиваемых свитчей
+            help='Concurrent switch polling workers.'
+        )
+
+    def process_switch(self, selected_switch, snmp_community, network):
+        """
+        Обрабатывает один свитч в потоке пула.
+        Возвращает True, если свитч обработан, и False, если пропущен.
+        """
+        try:
+            # --- Проверка IP адреса ---
+            switch_ip_str = selected_switch.ip
+            if not switch_ip_str:
+                logger.warning(f"Switch hostname '{selected_switch.hostname}' (PK: {selected_switch.pk}) has no IP address. Skipping.")
+                return False
+
+            try:
+                # Преобразуем строку IP в объект IP-адреса
+                switch_ip = parse_ip_address(switch_ip_str)
+            except ValueError:
+                logger.error(f"Invalid IP address format for switch '{selected_switch.hostname}': '{switch_ip_str}'. Skipping.")
+                return False
+
+            # --- Фильтрация по подсети ---
+            # Проверяем, входит ли IP свитча в нашу жестко заданную подсеть
+            # network содержит IPv4Network("10.47.0.0/16")
+            if switch_ip in network:
+                # IP подходит, обрабатываем свитч
+                logger.debug(f"Processing switch: {selected_switch.hostname} ({switch_ip}) - IP is within the allowed subnet {network}.")
+
+                # Создаем экземпляр SNMPUpdater и запускаем обновление
+                snmp_updater = SNMPUpdater(selected_switch, snmp_community)
+                snmp_updater.update_switch_data() # Запускает асинхронную логику синхронно
+
+                return True
+            else:
+                # IP не входит в подсеть, пропускаем
+                logger.info(f"Skipping switch: {selected_switch.hostname} ({switch_ip}) - IP is outside the hardcoded subnet {network}.")
+                return False # Свитч пропущен
+
+        except Exception as e:
+            # Ловим неожиданные ошибки при обработке одного свитча,
+            # чтобы они не остановили всю команду
+            logger.error(f"Unexpected error processing switch {selected_switch.hostname} ({selected_switch.ip}): {e}", exc_info=True)
+            return False # Считаем как пропущенный из-за ошибки
 
     def handle(self, *args, **options):
         snmp_community = options['community'] # Получаем community из аргументов
@@ -406,65 +457,37 @@ class Command(BaseCommand):
         # Оставьте `while True`, если команда должна работать непрерывно.
         # Добавьте `import time` и `time.sleep(seconds)` в конце цикла для паузы.
         # Уберите `while True` и `break` для однократного выполнения.
-        while True:
-            logger.info(f"Starting switch update cycle for subnet {hardcoded_subnet_str}...")
-            # Получаем свитчи из БД со статусом True
-            selected_switches = Switch.objects.filter(status=True).order_by('-pk')
-            processed_count = 0
-            skipped_count = 0
-
-            # Итерируем по выбранным свитчам
-            for selected_switch in selected_switches:
-                try:
-                    # --- Проверка IP адреса ---
-                    switch_ip_str = selected_switch.ip
-                    if not switch_ip_str:
-                        logger.warning(f"Switch hostname '{selected_switch.hostname}' (PK: {selected_switch.pk}) has no IP address. Skipping.")
-                        skipped_count += 1
-                        continue
-
-                    try:
-                        # Преобразуем строку IP в объект IP-адреса
-                        switch_ip = parse_ip_address(switch_ip_str)
-                    except ValueError:
-                        logger.error(f"Invalid IP address format for switch '{selected_switch.hostname}': '{switch_ip_str}'. Skipping.")
-                        skipped_count += 1
-                        continue
-
-                    # --- Фильтрация по подсети ---
-                    # Проверяем, входит ли IP свитча в нашу жестко заданную подсеть
-                    # allowed_networks[0] содержит единственный объект IPv4Network("10.47.0.0/16")
-                    if switch_ip in allowed_networks[0]:
-                        # IP подходит, обрабатываем свитч
-                        logger.debug(f"Processing switch: {selected_switch.hostname} ({switch_ip}) - IP is within the allowed subnet {hardcoded_subnet_str}.")
-
-                        # Создаем экземпляр SNMPUpdater и запускаем обновление
-                        snmp_updater = SNMPUpdater(selected_switch, snmp_community)
-                        snmp_updater.update_switch_data() # Запускает асинхронную логику синхронно
-
-                        processed_count += 1
-                    else:
-                        # IP не входит в подсеть, пропускаем
-                        logger.info(f"Skipping switch: {selected_switch.hostname} ({switch_ip}) - IP is outside the hardcoded subnet {hardcoded_subnet_str}.")
-                        skipped_count += 1
-                        continue # Переходим к следующему свитчу
-
-                except Exception as e:
-                    # Ловим неожиданные ошибки при обработке одного свитча,
-                    # чтобы они не остановили всю команду
-                    logger.error(f"Unexpected error processing switch {selected_switch.hostname} ({selected_switch.ip}): {e}", exc_info=True)
-                    skipped_count += 1 # Считаем как пропущенный из-за ошибки
-
-            # Логируем итоги цикла
-            logger.info(f"Switch update cycle finished. Processed: {processed_count}, Skipped (outside subnet or error): {skipped_count}.")
-
-            # --- Управление циклом ---
-            # Если команда должна выполниться только один раз, используйте break
-            logger.info("Command finished one cycle.")
-            break
-
-            # Если нужен непрерывный цикл с паузой:
-            # import time
-            # sleep_duration = 300 # Пауза 5 минут
-            # logger.info(f"Sleeping for {sleep_duration} seconds before next cycle...")
-            # time.sleep(sleep_duration)
\ No newline at end of file
+        workers = options['workers']
+        # Один пул на все циклы: потоки сохраняют свои SNMP-движки и соединения с БД
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                logger.info(f"Starting switch update cycle for subnet {hardcoded_subnet_str}...")
+                # Получаем свитчи из БД со статусом True
+                # Модель свитча подтягивается JOIN'ом, а не отдельным запросом на каждый свитч
+                selected_switches = Switch.objects.filter(status=True).select_related('model').order_by('-pk')
+
+                # Свитчи опрашиваются параллельно в пуле потоков: время цикла определяется
+                # самыми медленными свитчами, а не суммой таймаутов всех свитчей.
+                # В работе одновременно не больше `workers` свитчей.
+                results = run_bounded(
+                    executor,
+                    lambda selected_switch: self.process_switch(selected_switch, snmp_community, allowed_networks[0]),
+                    selected_switches.iterator(chunk_size=500),
+                    workers,
+                )
+                processed_count = sum(1 for processed in results if processed)
+                skipped_count = len(results) - processed_count
+
+                # Логируем итоги цикла
+                logger.info(f"Switch update cycle finished. Processed: {processed_count}, Skipped (outside subnet or error): {skipped_count}.")
+
+                # --- Управление циклом ---
+                # Если команда должна выполниться только один раз, используйте break
+                logger.info("Command finished one cycle.")
+                break
+
+                # Если нужен непрерывный цикл с паузой:
+                # import time
+                # sleep_duration = 300 # Пауза 5 минут
+                # logger.info(f"Sleeping for {sleep_duration} seconds before next cycle...")
+                # time.sleep(sleep_duration)
\ No newline at end of file
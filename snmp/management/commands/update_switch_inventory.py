@@ -1,19 +1,26 @@
 import time
 import logging
 import re
-from django.core.paginator import Paginator
+from concurrent.futures import ThreadPoolExecutor
 from django.core.management.base import BaseCommand
 from snmp.models import Switch, SwitchModel, Ats
+from snmp.lib.pool import run_bounded
+from snmp.lib.subnet_index import SubnetIndex
+from snmp.lib.update_port_info import parse_oid
 from .snmp import perform_snmpwalk
-from django.db.models import Count
+from ping3 import ping
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SNMP RESPONSE")
 
 SNMP_COMMUNITY = "snmp2netread"
-OID_SYSTEM_HOSTNAME = 'iso.3.6.1.2.1.1.5.0'
-OID_SYSTEM_UPTIME = 'iso.3.6.1.2.1.1.3.0'
-OID_SYSTEM_DESCRIPTION = 'iso.3.6.1.2.1.1.1.0'
+# Numeric tuples, so pysnmp does not parse the dotted strings on every request
+OID_SYSTEM_HOSTNAME = parse_oid('iso.3.6.1.2.1.1.5.0')
+OID_SYSTEM_UPTIME = parse_oid('iso.3.6.1.2.1.1.3.0')
+OID_SYSTEM_DESCRIPTION = parse_oid('iso.3.6.1.2.1.1.1.0')
+# A dead host costs two SNMP timeouts with retries (~12s); an echo
+# request answers in milliseconds, so ask that first.
+PING_TIMEOUT = 1
 
 
 def convert_uptime_to_human_readable(uptime_in_hundredths):
@@ -26,82 +33,90 @@ def convert_uptime_to_human_readable(uptime_in_hundredths):
 class Command(BaseCommand):
     help = 'Update switch data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent switch polling workers.')
+
+    def poll_switch(self, selected_switch, subnets, switch_models):
+        try:
+            if not ping(selected_switch.ip, timeout=PING_TIMEOUT):
+                logger.warning(f"Host {selected_switch.ip} does not answer ping, skipping SNMP")
+                return
+            snmp_response_hostname = perform_snmpwalk(selected_switch.ip, OID_SYSTEM_HOSTNAME, SNMP_COMMUNITY)
+            snmp_response_uptime = perform_snmpwalk(selected_switch.ip, OID_SYSTEM_UPTIME, SNMP_COMMUNITY)
+            branch = subnets.lookup(selected_switch.ip)
+            if branch is not None:
+                selected_switch.branch = branch.branch  # Assigning Ats instance
+                selected_switch.ats = branch
+
+            if not snmp_response_hostname or not snmp_response_uptime:
+                logger.warning(f"No SNMP response received for IP address: {selected_switch.ip}")
+                return
+
+            try:
+                match_hostname = re.search(r'SNMPv2-MIB::sysName.0 = (.+)', snmp_response_hostname[0])
+                if match_hostname:
+                    selected_switch.hostname = match_hostname.group(1).strip()
+                else:
+                    raise ValueError(f"Unexpected SNMP response format for hostname: {snmp_response_hostname[0]}. Response: {snmp_response_hostname}")
+            except Exception as e:
+                logger.error(f"Error processing hostname for {selected_switch.ip}: {e}")
+                return
+
+            try:
+                match_uptime = re.search(r'SNMPv2-MIB::sysUpTime.0\s*=\s*(\d+)', snmp_response_uptime[0])
+                if match_uptime:
+                    selected_switch.uptime = convert_uptime_to_human_readable(match_uptime.group(1).strip())
+                else:
+                    raise ValueError(f"Unexpected SNMP response format for uptime: {snmp_response_uptime[0]}. Response: {snmp_response_uptime}")
+            except Exception as e:
+                logger.error(f"Error processing uptime for {selected_switch.ip}: {e}")
+                return
+
+            snmp_response_description = perform_snmpwalk(selected_switch.ip, OID_SYSTEM_DESCRIPTION, SNMP_COMMUNITY)
+            if not snmp_response_description:
+                return
+            try:
+                response_description = set(str(snmp_response_description[0]).strip().split())
+                # logger.info(f"Response description for {selected_switch.ip}: {response_description}")
+
+                # The last known model named in sysDescr wins, saved once
+                matched_model_id = None
+                for model_id, device_model in switch_models:
+                    if device_model in response_description:
+                        matched_model_id = model_id
+                if matched_model_id is not None:
+                    selected_switch.model_id = matched_model_id
+                    selected_switch.save()
+            except Exception as e:
+                logger.error(f"Error processing SNMP response for {selected_switch.ip}: {e}")
+                return
+        except Exception as e:
+            logger.error(f"Error updating inventory for {selected_switch.ip}: {e}")
+
     def handle(self, *args, **options):
-        switches_per_page = 10
         delay_seconds = 1
-
-        while True:
-            paginator = Paginator(Switch.objects.filter(status=True).order_by('-pk'), switches_per_page)
-
-            for page_number in range(1, paginator.num_pages + 1):
-                selected_switches = paginator.page(page_number)
-                ats = Ats.objects.all()
-                duplicate_ips = Switch.objects.values('ip').annotate(count=Count('ip')).filter(count__gt=1)
-                for selected_switch in selected_switches:
-                    SNMP_COMMUNITY = "snmp2netread"
-                    snmp_response_hostname = perform_snmpwalk(selected_switch.ip, OID_SYSTEM_HOSTNAME, SNMP_COMMUNITY)
-                    snmp_response_uptime = perform_snmpwalk(selected_switch.ip, OID_SYSTEM_UPTIME, SNMP_COMMUNITY)
-                    for branch in ats:
-                        if branch.contains_ip(selected_switch.ip):
-                            selected_switch.branch = branch.branch  # Assigning Ats instance
-                            selected_switch.ats = branch
-
-                    if not snmp_response_hostname or not snmp_response_uptime:
-                        logger.warning(f"No SNMP response received for IP address: {selected_switch.ip}")
-                        continue
-
-                    try:
-                        match_hostname = re.search(r'SNMPv2-MIB::sysName.0 = (.+)', snmp_response_hostname[0])
-                        if match_hostname:
-                            selected_switch.hostname = match_hostname.group(1).strip()
-                        else:
-                            raise ValueError(f"Unexpected SNMP response format for hostname: {snmp_response_hostname[0]}. Response: {snmp_response_hostname}")
-                    except Exception as e:
-                        logger.error(f"Error processing hostname for {selected_switch.ip}: {e}")
-                        continue
-
-                    try:
-                        match_uptime = re.search(r'SNMPv2-MIB::sysUpTime.0\s*=\s*(\d+)', snmp_response_uptime[0])
-                        if match_uptime:
-                            selected_switch.uptime = convert_uptime_to_human_readable(match_uptime.group(1).strip())
-                        else:
-                            raise ValueError(f"Unexpected SNMP response format for uptime: {snmp_response_uptime[0]}. Response: {snmp_response_uptime}")
-                    except Exception as e:
-                        logger.error(f"Error processing uptime for {selected_switch.ip}: {e}")
-                        continue
-
-                    snmp_response_description = perform_snmpwalk(selected_switch.ip, OID_SYSTEM_DESCRIPTION, SNMP_COMMUNITY)
-                    if not snmp_response_description:
-                        continue
-                    for duplicate_ip in duplicate_ips:
-                        ip = duplicate_ip['ip']
-                        
-                        # Retrieve duplicate hosts with the same IP
-                        duplicate_hosts = Switch.objects.filter(ip=ip).order_by('-id')[1:]
-
-                        # Keep the first instance and delete the duplicates
-                        for duplicate_host in duplicate_hosts:
-                            duplicate_host.delete()
-                    try:
-                        response_description = str(snmp_response_description[0]).strip().split()
-                        # logger.info(f"Response description for {selected_switch.ip}: {response_description}")
-
-                        # Retrieve the SwitchModel instance based on your model relationships
-                        
-                        switch_models = SwitchModel.objects.all()
-                        for db_model_instance in switch_models:
-                            db_model = db_model_instance.device_model
-
-                            if db_model in response_description:
-                                selected_switch.model = db_model_instance
-                                selected_switch.save()
-                            else:
-                                continue
-                    except Exception as e:
-                        logger.error(f"Error processing SNMP response for {selected_switch.ip}: {e}")
-                        continue
-
-            time.sleep(delay_seconds)
+        workers = options['workers']
+
+        # One pool for all sweeps keeps its threads' engines and connections
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                switches = Switch.objects.filter(status=True).order_by('-pk')
+                # Parse the ATS subnets once per sweep, not per page and switch
+                subnets = SubnetIndex(Ats.objects.select_related('branch').filter(subnet__isnull=False))
+                # Known models are read once per sweep, not once per polled switch,
+                # as (id, device_model) pairs since nothing else is needed
+                switch_models = list(SwitchModel.objects.values_list('id', 'device_model'))
+
+                # Ping and SNMP round-trips of different switches overlap instead of
+                # adding up; only `workers` polls are in flight at a time
+                run_bounded(
+                    executor,
+                    lambda selected_switch: self.poll_switch(selected_switch, subnets, switch_models),
+                    switches.iterator(chunk_size=500),
+                    workers,
+                )
+
+                time.sleep(delay_seconds)
 
 if __name__ == '__main__':
     Command().handle()
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from snmp.models import Switch
+from snmp.lib.update_port_info import PortsInfo
+
+logger = logging.getLogger("SNMP PORTS")
+
+
+class Command(BaseCommand):
+    help = 'Update port data of all online switches concurrently'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent switch polling workers.')
+
+    async def poll_switch(self, executor, ports_info, switch):
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(executor, ports_info.update_port_data, switch)
+        except Exception as e:
+            logger.error(f"Error updating ports for {switch.ip}: {e}")
+
+    async def handle_async(self, switches, workers):
+        ports_info = PortsInfo()
+        pending = iter(switches)
+
+        async def worker(executor):
+            # Workers pull the next switch when they finish one, so only
+            # `workers` polls are in flight instead of a future per switch
+            for switch in pending:
+                await self.poll_switch(executor, ports_info, switch)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            await asyncio.gather(*(worker(executor) for _ in range(workers)))
+
+    def handle(self, *args, **options):
+        # Port polling only reads the address and community of each switch
+        switches = list(
+            Switch.objects.filter(status=True, ip__isnull=False)
+            .only('id', 'ip', 'snmp_community_ro')
+            .order_by('-pk')
+        )
+        self.stdout.write(f"Polling ports of {len(switches)} switches...")
+        asyncio.run(self.handle_async(switches, options['workers']))
+        self.stdout.write(self.style.SUCCESS("Port poll finished."))
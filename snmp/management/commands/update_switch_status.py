@@ -2,7 +2,8 @@ import asyncio
 import logging
 from django.core.management.base import BaseCommand
 from snmp.models import Switch
-from ping3 import ping
+from snmp.lib.icmp import fping_batch
+from snmp.lib.switches import save_statuses
 from asgiref.sync import sync_to_async
 import time
 
@@ -12,58 +13,42 @@ logger = logging.getLogger("ICMP RESPONSE")
 class Command(BaseCommand):
     help = 'Update switch data'
 
-    @sync_to_async
-    def save_switch(self, switch):
-        switch.save()
-
-    async def update_switch_status(self, ip):
-        try:
-            if ip is None:
-                return
-            start_time = time.time()
-            # host_alive = ping(ip, unit='ms', size=32, timeout=2, interface='ens192')
-            host_alive = ping(ip, unit='ms', size=32, timeout=2)
-            elapsed_time = time.time() - start_time
-            switch = await sync_to_async(Switch.objects.filter(ip=ip).first)()
-
-            if switch is None:
-                status = False
-                logger.info(status)
-                switch.status = status
-                await self.save_switch(switch)
-            else:
-                status = bool(host_alive)
-                logger.info(host_alive)
-                switch.status = status
-                await self.save_switch(switch)
-
-        except Exception as e:
-            logger.info(f"Error updating switch status for {ip}: {e}")
-
     async def handle_async(self, *args, **options):
-        total_start_time = time.time()
-        switches_per_batch = 5
+        total_start_time = time.monotonic()
+        # One fping run per batch pings all of its switches in parallel
+        switches_per_batch = 500
+        loop = asyncio.get_event_loop()
 
         while True:
-            switches_count = await sync_to_async(Switch.objects.count)()
-
-            for offset in range(0, switches_count, switches_per_batch):
-                ip_addresses = await sync_to_async(list)(
-                    Switch.objects.values_list('ip', flat=True).order_by('last_update')[offset:offset + switches_per_batch]
-                )
-
-                batch_start_time = time.time()
-
-                tasks = [self.update_switch_status(ip) for ip in ip_addresses]
-                await asyncio.gather(*tasks)
-
-                batch_elapsed_time = time.time() - batch_start_time
+            # One query per sweep instead of a COUNT plus an OFFSET query per batch
+            all_ip_addresses = await sync_to_async(list)(
+                Switch.objects.exclude(ip__isnull=True).values_list('ip', flat=True).order_by('last_update')
+            )
+
+            for offset in range(0, len(all_ip_addresses), switches_per_batch):
+                ip_addresses = all_ip_addresses[offset:offset + switches_per_batch]
+
+                batch_start_time = time.monotonic()
+
+                alive = await loop.run_in_executor(None, fping_batch, ip_addresses)
+                if alive is None:
+                    # No result is not the same as every switch being down
+                    logger.warning(f"Skipping batch of {len(ip_addresses)} switches, fping failed")
+                    continue
+                try:
+                    # A few UPDATEs per batch instead of a SELECT and a save per switch
+                    flipped = await sync_to_async(save_statuses)(alive)
+                    logger.info(f"{flipped} of {len(alive)} switches changed status")
+                except Exception as e:
+                    logger.info(f"Error updating switch statuses: {e}")
+
+                batch_elapsed_time = time.monotonic() - batch_start_time
                 logger.info(f"Batch processed in {batch_elapsed_time:.2f} seconds")
 
             # Introduce a delay between iterations
             await asyncio.sleep(0)  # Adjust the delay as needed (e.g., 60 seconds)
 
-            total_elapsed_time = time.time() - total_start_time
+            total_elapsed_time = time.monotonic() - total_start_time
             logger.info(f"Total elapsed time: {total_elapsed_time:.2f} seconds")
 
     def handle(self, *args, **options):
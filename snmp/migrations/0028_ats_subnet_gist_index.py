@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+# inet_ops GiST indexes only exist on PostgreSQL; other backends skip them
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS ats_subnet_gist_idx ON ats USING gist (subnet inet_ops);')
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS ats_subnet_gist_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snmp', '0027_alter_historicalswitch_options_alter_ats_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snmp', '0028_ats_subnet_gist_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='switch',
+            index=models.Index(fields=['status', 'last_update'], name='idx_switch_status_update'),
+        ),
+        migrations.AddIndex(
+            model_name='switch',
+            index=models.Index(fields=['rx_signal'], name='idx_switch_rx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.db.models import Count, Max, Q
+
+
+def delete_duplicate_ips(apps, schema_editor):
+    Switch = apps.get_model('snmp', 'Switch')
+    HistoricalSwitch = apps.get_model('snmp', 'HistoricalSwitch')
+    SwitchesPorts = apps.get_model('snmp', 'SwitchesPorts')
+    Mac = apps.get_model('snmp', 'Mac')
+    duplicate_ips = list(
+        Switch.objects.filter(ip__isnull=False)
+        .values('ip')
+        .annotate(count=Count('id'), keep=Max('id'))
+        .filter(count__gt=1)
+    )
+    if not duplicate_ips:
+        return
+    # Keep the newest switch per IP, as update_switch_inventory did every sweep
+    for row in duplicate_ips:
+        duplicates = list(
+            Switch.objects.filter(ip=row['ip']).exclude(id=row['keep']).values_list('id', flat=True)
+        )
+        # The kept switch takes over the history of the ones it replaces
+        HistoricalSwitch.objects.filter(id__in=duplicates).update(id=row['keep'])
+
+    duplicates = Switch.objects.filter(ip__in=[row['ip'] for row in duplicate_ips]).exclude(
+        id__in=[row['keep'] for row in duplicate_ips]
+    )
+    # Ports and MACs are polled again for the kept switch, so the rows of
+    # the duplicates are dropped rather than merged into its (switch, port)
+    # and (switch, mac, vlan) keys. Their foreign keys are DO_NOTHING, so
+    # nothing would clean them up after the switches are gone.
+    ports = SwitchesPorts.objects.filter(switch__in=duplicates)
+    Switch.objects.filter(port__in=ports).update(port=None)
+    Mac.objects.filter(Q(switch__in=duplicates) | Q(port__in=ports)).delete()
+    ports.delete()
+    duplicates.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snmp', '0029_switch_status_update_rx_ip_indexes'),
+    ]
+
+    operations = [
+        # Kept apart from the unique index: Postgres refuses ALTER TABLE on
+        # switches while the deletes' deferred foreign key checks are queued
+        migrations.RunPython(delete_duplicate_ips, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snmp', '0030_delete_duplicate_switch_ips'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='switch',
+            name='ip',
+            field=models.GenericIPAddressField(blank=True, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='historicalswitch',
+            name='ip',
+            field=models.GenericIPAddressField(blank=True, db_index=True, null=True),
+        ),
+    ]
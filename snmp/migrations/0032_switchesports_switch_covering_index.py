@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+# Carries id and pvid next to (switch_id, port), so lookups of a switch's
+# port ids and PVIDs are answered from the index alone. INCLUDE is
+# PostgreSQL syntax; other backends skip the index.
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS switches_ports_switch_covering_idx ON switches_ports (switch_id, port) INCLUDE (id, pvid);'
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS switches_ports_switch_covering_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snmp', '0031_switch_unique_ip'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -17,21 +17,25 @@ def create_branch_permissions(sender, **kwargs):
 
     # Define the branches for which you want to create permissions
     branches = Branch.objects.all()
+    existing = set(Permission.objects.filter(content_type=content_type).values_list('codename', flat=True))
 
-    # Create a permission for each branch
+    # Create the missing permissions in one query instead of a get_or_create per branch
+    permissions = {}
     for branch in branches:
         codename = f'view_{branch.name.lower().replace(" ", "_")}'
-        name = f'Can view switches in {branch.name}'
-        permission, created = Permission.objects.get_or_create(
+        if codename in existing or codename in permissions:
+            continue
+        permissions[codename] = Permission(
             codename=codename,
-            name=name,
+            name=f'Can view switches in {branch.name}',
             content_type=content_type,
         )
+    Permission.objects.bulk_create(permissions.values(), ignore_conflicts=True)
 
-        # Optionally, assign the permission to a specific group
-        # For example, if you have a group named "Branch Managers"
-        # group = Group.objects.get(name='Branch Managers')
-        # group.permissions.add(permission)
+    # Optionally, assign the permissions to a specific group
+    # For example, if you have a group named "Branch Managers"
+    # group = Group.objects.get(name='Branch Managers')
+    # group.permissions.add(*permissions.values())
 
 
 
@@ -116,7 +120,7 @@ class Switch(models.Model):
     uptime = models.CharField(max_length=200, blank=True, null=True)
     last_update = models.DateTimeField(auto_now=True, null=True, blank=True)
     hostname = models.CharField(max_length=200, null=True, blank=True)
-    ip = models.GenericIPAddressField(protocol='both', null=True, blank=True)
+    ip = models.GenericIPAddressField(unique=True, protocol='both', null=True, blank=True)
     switch_mac = models.CharField(unique=True, max_length=17, null=True, blank=True)
     snmp_community_ro = models.CharField(max_length=20, default='eriwpirt', null=True, blank=True)
     snmp_community_rw = models.CharField(max_length=20, default='netman', null=True, blank=True)
@@ -140,6 +144,8 @@ class Switch(models.Model):
         unique_together = (('hostname', 'ip'),)
         indexes = [
             models.Index(fields=['status', 'hostname', 'ip', 'rx_signal', 'tx_signal']),
+            models.Index(fields=['status', 'last_update'], name='idx_switch_status_update'),
+            models.Index(fields=['rx_signal'], name='idx_switch_rx'),
         ]
     
     def save(self, *args, **kwargs):
@@ -19,3 +19,7 @@ def update_switch_inventory_task():
 @shared_task
 def subnet_discovery_task():
     call_command('subnet_discovery')
+
+@shared_task
+def cleanup_switch_history_task():
+    call_command('cleanup_switch_history')
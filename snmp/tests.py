@@ -1 +1,305 @@
-from django.test import TestCase
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from ipaddress import IPv4Network
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from snmp.lib.icmp import fping_batch
+from snmp.lib.pool import run_bounded
+from snmp.lib.subnet_index import SubnetIndex
+from snmp.lib.switches import create_switches, save_statuses
+from snmp.lib.update_port_info import (
+    _centi_dbm, _dbm, _microwatt, _milli_dbm, get_signal_converter,
+)
+from snmp.management.commands.subnet_discovery import scan_hosts
+from snmp.models import Ats, Branch, Switch
+from snmp.views.dashboard_views import switch_counts
+
+
+class SubnetIndexTests(SimpleTestCase):
+
+    def test_longest_prefix_wins(self):
+        wide = Ats(name='wide', subnet='10.0.0.0/16')
+        narrow = Ats(name='narrow', subnet='10.0.1.0/24')
+        index = SubnetIndex([wide, narrow])
+        self.assertIs(index.lookup('10.0.1.5'), narrow)
+        self.assertIs(index.lookup('10.0.2.5'), wide)
+        self.assertIsNone(index.lookup('10.1.0.1'))
+
+    def test_matches_contains_ip(self):
+        ats_list = [
+            Ats(name='a', subnet='10.0.0.0/16'),
+            Ats(name='b', subnet='10.0.1.0/24'),
+            Ats(name='c', subnet='192.168.0.0/25'),
+        ]
+        index = SubnetIndex(ats_list)
+        for address in ('10.0.1.1', '10.0.200.1', '192.168.0.127', '192.168.0.128'):
+            expected = [ats for ats in ats_list if ats.contains_ip(address)]
+            found = index.lookup(address)
+            if expected:
+                self.assertIn(found, expected)
+            else:
+                self.assertIsNone(found)
+
+    def test_first_duplicate_subnet_wins(self):
+        first = Ats(name='first', subnet='10.0.0.0/24')
+        second = Ats(name='second', subnet='10.0.0.0/24')
+        self.assertIs(SubnetIndex([first, second]).lookup('10.0.0.9'), first)
+
+    def test_skips_missing_and_invalid_subnets(self):
+        index = SubnetIndex([
+            Ats(name='none', subnet=None),
+            Ats(name='empty', subnet=''),
+            Ats(name='invalid', subnet='not-a-subnet'),
+        ])
+        self.assertIsNone(index.lookup('10.0.0.1'))
+
+    def test_invalid_addresses(self):
+        index = SubnetIndex([Ats(name='all', subnet='0.0.0.0/0')])
+        self.assertIsNone(index.lookup(None))
+        self.assertIsNone(index.lookup(''))
+        self.assertIsNone(index.lookup('999.1.1.1'))
+        self.assertIsNone(index.lookup('::1'))
+
+    def test_accepts_objects_with_subnet(self):
+        entry = SimpleNamespace(subnet='172.16.0.0/12')
+        self.assertIs(SubnetIndex([entry]).lookup('172.20.1.1'), entry)
+
+
+class SignalConverterTests(SimpleTestCase):
+
+    def test_families(self):
+        self.assertIs(get_signal_converter('MES3500-24S'), _centi_dbm)
+        self.assertIs(get_signal_converter('GS3700-24HP'), _centi_dbm)
+        self.assertIs(get_signal_converter('MGS3520-28'), _centi_dbm)
+        self.assertIs(get_signal_converter('S3328TP-SI'), _microwatt)
+        self.assertIs(get_signal_converter('T2600G-28TS'), _microwatt)
+        self.assertIs(get_signal_converter('SNR-S2985G-24TC'), _dbm)
+
+    def test_precedence_follows_family_order(self):
+        # Checked in the order of the old if/elif chain, not by position in the name
+        self.assertIs(get_signal_converter('SNR-3500'), _centi_dbm)
+        self.assertIs(get_signal_converter('SNR-T2600G'), _microwatt)
+        self.assertIs(get_signal_converter('T2600G-GS3700'), _centi_dbm)
+
+    def test_unknown_model_falls_back_to_milli_dbm(self):
+        self.assertIs(get_signal_converter('DES-3200-28'), _milli_dbm)
+
+    def test_no_model(self):
+        self.assertIsNone(get_signal_converter(None))
+        self.assertIsNone(get_signal_converter(''))
+
+
+class ScanHostsTests(SimpleTestCase):
+
+    def test_skips_gateway_and_broadcast(self):
+        subnet = IPv4Network('10.101.0.0/25')
+        hosts = scan_hosts(subnet)
+        self.assertEqual(hosts[0], int(subnet.network_address) + 2)
+        self.assertEqual(hosts[-1], int(subnet.broadcast_address) - 1)
+        self.assertEqual(list(hosts), [int(host) for host in list(subnet.hosts())[1:]])
+
+
+class SaveStatusesTests(TestCase):
+
+    def test_flips_and_stamps(self):
+        came_up = Switch.objects.create(ip='10.0.0.1', status=False)
+        went_down = Switch.objects.create(ip='10.0.0.2', status=True)
+        unchanged = Switch.objects.create(ip='10.0.0.3', status=True)
+        before = {switch.pk: switch.last_update for switch in (came_up, went_down, unchanged)}
+
+        flipped = save_statuses({'10.0.0.1': True, '10.0.0.2': False, '10.0.0.3': True})
+
+        self.assertEqual(flipped, 2)
+        for switch, status in ((came_up, True), (went_down, False), (unchanged, True)):
+            switch.refresh_from_db()
+            self.assertIs(switch.status, status)
+            self.assertGreater(switch.last_update, before[switch.pk])
+
+    def test_history_only_for_flipped_switches(self):
+        came_up = Switch.objects.create(ip='10.0.0.1', status=False)
+        unchanged = Switch.objects.create(ip='10.0.0.2', status=True)
+
+        save_statuses({'10.0.0.1': True, '10.0.0.2': True})
+
+        self.assertEqual(came_up.history.count(), 2)
+        self.assertTrue(came_up.history.first().status)
+        self.assertEqual(unchanged.history.count(), 1)
+
+    def test_ignores_unknown_addresses(self):
+        self.assertEqual(save_statuses({'10.9.9.9': True}), 0)
+        self.assertFalse(Switch.objects.exists())
+
+
+class CreateSwitchesTests(TestCase):
+
+    def test_creates_with_history(self):
+        created = create_switches([Switch(ip='10.0.0.1'), Switch(ip='10.0.0.2')])
+        self.assertEqual(len(created), 2)
+        self.assertEqual(Switch.history.filter(history_type='+').count(), 2)
+
+    def test_skips_addresses_taken_meanwhile(self):
+        existing = Switch.objects.create(ip='10.0.0.1', hostname='existing')
+
+        created = create_switches([Switch(ip='10.0.0.1'), Switch(ip='10.0.0.2')])
+
+        self.assertEqual([switch.ip for switch in created], ['10.0.0.2'])
+        self.assertEqual(Switch.objects.count(), 2)
+        existing.refresh_from_db()
+        self.assertEqual(existing.hostname, 'existing')
+        self.assertTrue(Switch.history.filter(ip='10.0.0.2', history_type='+').exists())
+
+    def test_all_taken(self):
+        Switch.objects.create(ip='10.0.0.1')
+        self.assertEqual(create_switches([Switch(ip='10.0.0.1')]), [])
+        self.assertEqual(Switch.objects.count(), 1)
+
+    def test_nothing_to_create(self):
+        self.assertEqual(create_switches([]), [])
+
+
+class RunBoundedTests(SimpleTestCase):
+
+    def test_bounds_calls_in_flight(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+
+        def work(item):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+            return item * 2
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = run_bounded(executor, work, iter(range(20)), 3)
+
+        self.assertEqual(sorted(results), [item * 2 for item in range(20)])
+        self.assertLessEqual(state['peak'], 3)
+
+    def test_failed_calls_are_logged_and_skipped(self):
+        def work(item):
+            if item % 2:
+                raise ValueError(item)
+            return item
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            with self.assertLogs('snmp.lib.pool', 'ERROR') as logs:
+                results = run_bounded(executor, work, range(6), 2)
+
+        self.assertEqual(sorted(results), [0, 2, 4])
+        self.assertEqual(len(logs.records), 3)
+
+    def test_pool_is_reusable(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(run_bounded(executor, str, [], 2), [])
+            self.assertEqual(sorted(run_bounded(executor, str, [1, 2], 2)), ['1', '2'])
+
+
+class FpingBatchTests(SimpleTestCase):
+    ips = ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+
+    def fping(self, returncode, stdout='', stderr=''):
+        return mock.patch(
+            'snmp.lib.icmp.subprocess.run',
+            return_value=subprocess.CompletedProcess([], returncode, stdout, stderr),
+        )
+
+    def test_some_hosts_down(self):
+        with self.fping(1, '10.0.0.1\n10.0.0.3\n') as run:
+            alive = fping_batch(self.ips, interface='eth1')
+        self.assertEqual(alive, {'10.0.0.1': True, '10.0.0.2': False, '10.0.0.3': True})
+        command = run.call_args[0][0]
+        self.assertEqual(command[command.index('-I') + 1], 'eth1')
+        self.assertEqual(command[-3:], self.ips)
+
+    def test_invalid_address_keeps_results(self):
+        with self.fping(2, '10.0.0.1\n', '10.0.0.3: Name or service not known\n'):
+            with self.assertLogs('ICMP RESPONSE', 'WARNING'):
+                alive = fping_batch(self.ips)
+        self.assertEqual(alive, {'10.0.0.1': True, '10.0.0.2': False, '10.0.0.3': False})
+
+    def test_fping_failure(self):
+        with self.fping(4, '', "fping: can't create socket (must run as root?)\n"):
+            with self.assertLogs('ICMP RESPONSE', 'ERROR'):
+                self.assertIsNone(fping_batch(self.ips))
+
+    def test_falls_back_to_ping3(self):
+        with mock.patch('snmp.lib.icmp.subprocess.run', side_effect=FileNotFoundError), \
+                mock.patch('snmp.lib.icmp.ping', side_effect=[0.01, None, False]):
+            alive = fping_batch(self.ips)
+        self.assertEqual(alive, {'10.0.0.1': True, '10.0.0.2': False, '10.0.0.3': False})
+
+    def test_no_addresses(self):
+        with self.fping(0) as run:
+            self.assertEqual(fping_batch([]), {})
+        run.assert_not_called()
+
+
+class SwitchCountsTests(TestCase):
+
+    def test_buckets(self):
+        branch = Branch.objects.create(name='branch')
+        other = Branch.objects.create(name='other')
+        for ip, status, rx_signal in (
+            ('10.0.0.1', True, -25.0),
+            ('10.0.0.2', True, -20.0),
+            ('10.0.0.3', True, -17.0),
+            ('10.0.0.4', False, -15.0),
+            ('10.0.0.5', False, -11.0),
+            ('10.0.0.6', True, -10.5),
+            ('10.0.0.7', True, None),
+        ):
+            Switch.objects.create(ip=ip, status=status, rx_signal=rx_signal, branch=branch)
+        Switch.objects.create(ip='10.0.1.1', status=True, rx_signal=-30.0, branch=other)
+
+        self.assertEqual(switch_counts([branch]), {
+            'sw_online': 5,
+            'sw_offline': 2,
+            'high_signal_sw': 2,
+            'high_signal_sw_15': 2,
+            'high_signal_sw_10': 1,
+            'high_signal_sw_11': 5,
+        })
+
+
+class AssignSwitchesToBranchesTests(TestCase):
+
+    def setUp(self):
+        self.branch = Branch.objects.create(name='branch')
+        self.wide = Ats.objects.create(name='wide', subnet='10.0.0.0/16', branch=self.branch)
+        self.narrow = Ats.objects.create(name='narrow', subnet='10.0.1.0/24', branch=self.branch)
+
+    def assign(self):
+        out = StringIO()
+        call_command('assign_switches_to_branches', stdout=out)
+        return out.getvalue()
+
+    def test_assigns_longest_prefix_with_history(self):
+        switch = Switch.objects.create(ip='10.0.1.5')
+        outside = Switch.objects.create(ip='10.1.0.5')
+
+        output = self.assign()
+
+        switch.refresh_from_db()
+        self.assertEqual((switch.ats, switch.branch), (self.narrow, self.branch))
+        self.assertIn(f'Switch {switch.id} assigned to branch narrow', output)
+        self.assertEqual(switch.history.count(), 2)
+        self.assertEqual(switch.history.first().ats_id, self.narrow.id)
+        outside.refresh_from_db()
+        self.assertIsNone(outside.ats)
+        self.assertEqual(outside.history.count(), 1)
+
+    def test_leaves_assigned_switches_alone(self):
+        switch = Switch.objects.create(ip='10.0.2.5', ats=self.wide, branch=self.branch)
+
+        self.assertEqual(self.assign(), '')
+        self.assertEqual(switch.history.count(), 1)
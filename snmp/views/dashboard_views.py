@@ -1,25 +1,46 @@
+import hashlib
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import Count, Q
 from snmp.models import Switch, SwitchesNeighbors
 from .qoshimcha import get_permitted_branches
 
+# Users with the same branches share the counts for this many seconds;
+# a minute-old overview is fine and saves the aggregate on every reload.
+DASHBOARD_CACHE_TTL = 60
+
+
+def switch_counts(branches):
+    # One aggregate over the permitted switches instead of a COUNT per card
+    counts = Switch.objects.filter(branch__in=branches).aggregate(
+        sw_online=Count('id', filter=Q(status=True)),
+        sw_offline=Count('id', filter=Q(status=False)),
+        high_signal_sw=Count('id', filter=Q(rx_signal__lte=-20)),
+        high_signal_sw_15=Count('id', filter=Q(rx_signal__lte=-15, rx_signal__gt=-20)),
+        high_signal_sw_10=Count('id', filter=Q(rx_signal__lte=-11, rx_signal__gt=-15)),
+    )
+    # rx <= -11 is exactly the union of the three disjoint ranges above
+    counts['high_signal_sw_11'] = counts['high_signal_sw'] + counts['high_signal_sw_15'] + counts['high_signal_sw_10']
+    return counts
+
+
 @login_required
 def switches_updown(request):
     user_permitted_branches = get_permitted_branches(request.user)
-    sw_online = Switch.objects.filter(status=True, branch__in=user_permitted_branches).count()
-    sw_offline = Switch.objects.filter(status=False, branch__in=user_permitted_branches).count()
-    high_signal_sw = Switch.objects.filter(rx_signal__lte=-20, branch__in=user_permitted_branches).count()
-    high_signal_sw_15 = Switch.objects.filter(rx_signal__lte=-15, rx_signal__gt=-20, branch__in=user_permitted_branches).count()
-    high_signal_sw_10 = Switch.objects.filter(rx_signal__lte=-11, rx_signal__gt=-15, branch__in=user_permitted_branches).count()
-    high_signal_sw_11 = Switch.objects.filter(rx_signal__lte=-11, branch__in=user_permitted_branches).count()
+    branch_ids = ','.join(str(pk) for pk in sorted(branch.pk for branch in user_permitted_branches))
+    cache_key = 'dashboard-counts:%s' % hashlib.md5(branch_ids.encode()).hexdigest()
+    counts = cache.get_or_set(
+        cache_key, lambda: switch_counts(user_permitted_branches), DASHBOARD_CACHE_TTL
+    )
 
     return render(request, 'dashboard.html', {
-        'up_count': sw_online,
-        'down_count': sw_offline,
-        'high_sig_sw': high_signal_sw,
-        'high_sig_sw_15': high_signal_sw_15,
-        'high_sig_sw_10': high_signal_sw_10,
-        'high_sig_sw_11': high_signal_sw_11,
+        'up_count': counts['sw_online'],
+        'down_count': counts['sw_offline'],
+        'high_sig_sw': counts['high_signal_sw'],
+        'high_sig_sw_15': counts['high_signal_sw_15'],
+        'high_sig_sw_10': counts['high_signal_sw_10'],
+        'high_sig_sw_11': counts['high_signal_sw_11'],
     })
 
 
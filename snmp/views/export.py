@@ -18,6 +18,19 @@ def sanitize_for_excel(text):
     return text # Return non-string types (like numbers, None) as is
 # --- End Sanitization Function ---
 
+# (header, queryset field) for every exported column, in sheet order
+EXPORT_COLUMNS = (
+    ('Branch', 'ats__branch__name'),
+    ('ATS', 'ats__name'),
+    ('Hostname', 'hostname'),
+    ('IP', 'ip'),
+    ('Model', 'model__device_model'),
+    ('Uptime', 'uptime'),
+    ('RX', 'rx_signal'),
+    ('TX', 'tx_signal'),
+    ('Last check', 'last_update'),
+)
+
 def export_high_sig_switches_to_excel(request):
     current_datetime = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     filename = f"switches_with_high_sig_lvl_{current_datetime}.xlsx"
@@ -28,38 +41,29 @@ def export_high_sig_switches_to_excel(request):
     )
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = "High Signal Switches" # Optional: Give the sheet a name
-    worksheet.append(['Branch', 'ATS', 'Hostname', 'IP', 'Model', 'Uptime', 'RX', 'TX', 'Last check'])
+    # Write-only mode streams rows to the file instead of keeping every cell object in memory
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title="High Signal Switches")
+    worksheet.append([header for header, field in EXPORT_COLUMNS])
 
     user_permitted_branches = get_permitted_branches(request.user)
-    switches = Switch.objects.filter(
+    # Flat tuples in the column order, no Switch/Ats/Model instances per row
+    rows = Switch.objects.filter(
         rx_signal__lte=-11, branch__in=user_permitted_branches
-    ).select_related('ats', 'ats__branch', 'model').order_by('rx_signal') # Use select_related for efficiency
+    ).order_by('rx_signal').values_list(*(field for header, field in EXPORT_COLUMNS))
 
-    for switch in switches:
+    for branch_name, ats_name, hostname, ip_address, model_name, uptime, rx_signal, tx_signal, last_update in rows.iterator(chunk_size=2000):
         # *** Sanitize string fields before appending ***
-        branch_name = sanitize_for_excel(switch.ats.branch.name)
-        ats_name = sanitize_for_excel(switch.ats.name)
-        hostname = sanitize_for_excel(switch.hostname)
-        ip_address = sanitize_for_excel(switch.ip)
-        model_name = sanitize_for_excel(switch.model.device_model if switch.model else '')
-        # Ensure uptime is treated as a string before sanitizing if it might be complex
-        uptime_str = sanitize_for_excel(str(switch.uptime or ''))
-        last_update_str = switch.last_update.strftime('%Y-%m-%d %H:%M:%S') if switch.last_update else ''
-        # rx/tx signals are likely numeric, no sanitization needed unless they are stored as strings
-
         worksheet.append([
-            branch_name,
-            ats_name,
-            hostname,
-            ip_address,
-            model_name,
-            uptime_str,
-            switch.rx_signal, # Numeric
-            switch.tx_signal, # Numeric
-            last_update_str,  # Already formatted string, usually safe
+            sanitize_for_excel(branch_name),
+            sanitize_for_excel(ats_name),
+            sanitize_for_excel(hostname),
+            sanitize_for_excel(ip_address),
+            sanitize_for_excel(model_name or ''),
+            sanitize_for_excel(str(uptime or '')),
+            rx_signal, # Numeric
+            tx_signal, # Numeric
+            last_update.strftime('%Y-%m-%d %H:%M:%S') if last_update else '',
         ])
 
     workbook.save(response)
@@ -1,5 +1,16 @@
-from snmp.models import Branch
+from snmp.models import Branch, Switch
 
+# Columns the switch list templates render; the related rows come in
+# the same query instead of one lookup per row and relation.
+SWITCH_LIST_FIELDS = (
+    'id', 'hostname', 'ip', 'status', 'uptime', 'last_update', 'rx_signal',
+    'ats', 'ats__name', 'ats__branch__name',
+    'model', 'model__device_model', 'model__vendor__name',
+)
+
+
+def switch_list_queryset():
+    return Switch.objects.select_related('ats__branch', 'model__vendor').only(*SWITCH_LIST_FIELDS)
 
 
 def convert_uptime_to_human_readable(uptime_in_hundredths):
@@ -11,8 +22,12 @@ def convert_uptime_to_human_readable(uptime_in_hundredths):
 
 def get_permitted_branches(user):
     branches = Branch.objects.all()
+    if user.is_active and user.is_superuser:
+        return list(branches)
+    # Resolve the user's permissions once instead of a has_perm() per branch
+    user_perms = user.get_all_permissions() if user.is_active else set()
     permitted_branches = []
     for branch in branches:
-        if user.has_perm(f'snmp.view_{branch.name.lower().replace(" ", "_")}'):
-            permitted_branches.append(branch)      
+        if f'snmp.view_{branch.name.lower().replace(" ", "_")}' in user_perms:
+            permitted_branches.append(branch)
     return permitted_branches
\ No newline at end of file
@@ -5,6 +5,7 @@ from django.shortcuts import redirect
 import requests
 from urllib3.exceptions import InsecureRequestWarning
 from django.contrib.auth.decorators import login_required
+from snmp.lib.switches import create_switches
 
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
@@ -18,12 +19,14 @@ def sync_hosts_from_zabbix(request):
         'Content-Type': 'application/json',
         'Authorization': f'Bearer {zabbix_token}'
     }
-    # Define the API request payload
+    # Define the API request payload; interfaces come with the hosts so the
+    # whole inventory is one response instead of a hostinterface.get per host
     payload = {
         'jsonrpc': '2.0',
         'method': 'host.get',
         'params': {
-            'output': ['hostid', 'host', 'name']
+            'output': ['hostid', 'host', 'name'],
+            'selectInterfaces': ['ip']
         },
         'auth': zabbix_token,
         'id': 1
@@ -36,29 +39,16 @@ def sync_hosts_from_zabbix(request):
         hosts_result = response.json()
 
         if 'result' in hosts_result:
+            # Known IPs are loaded once instead of checked with a query per host
+            existing_ips = set(Switch.objects.exclude(ip__isnull=True).values_list('ip', flat=True))
+            new_switches = []
             for host_data in hosts_result['result']:
                 hostname = host_data['name']
+                interfaces = host_data.get('interfaces')
 
-                # Fetch interface information for the host
-                interfaces_payload = {
-                    'jsonrpc': '2.0',
-                    'method': 'hostinterface.get',
-                    'params': {
-                        'output': ['ip'],
-                        'hostids': [host_data['hostid']]
-                    },
-                    'auth': zabbix_token,
-                    'id': 1
-                }
-
-                # Make a request to get interface information
-                interfaces_response = requests.post(zabbix_url, headers=headers, json=interfaces_payload, verify=False)
-                interfaces_response.raise_for_status()
-                interfaces_result = interfaces_response.json()
-
-                if 'result' in interfaces_result and interfaces_result['result']:
+                if interfaces:
                     
-                    ip_address = interfaces_result['result'][0]['ip']  # Assuming only one interface per host
+                    ip_address = interfaces[0]['ip']  # Assuming only one interface per host
                     
                     # Retrieve the list of IPs from Zabbix
                     # Retrieve the list of IPs from Zabbix
@@ -73,11 +63,15 @@ def sync_hosts_from_zabbix(request):
                     #     print(ip)
                     # Switch.objects.filter(ip__in=ips_to_delete).delete()
                     # Check if the IP address already exists in the database
-                    if not Switch.objects.filter(ip=ip_address).exists():
-                        # If IP address doesn't exist, create a new switch
-                        switch = Switch.objects.create(hostname=hostname, ip=ip_address)
+                    if ip_address not in existing_ips:
+                        # If IP address doesn't exist, queue a new switch
+                        new_switches.append(Switch(hostname=hostname, ip=ip_address))
+                        existing_ips.add(ip_address)
                         # You can perform additional operations here if needed
 
+            # All new switches and their history rows in a few INSERTs,
+            # skipping IPs a concurrent sync or discovery run added first
+            create_switches(new_switches, batch_size=500)
             return redirect('dashboard')
         else:
             return redirect('dashboard')
@@ -5,7 +5,7 @@ from django.contrib.auth.decorators import login_required
 from snmp.models import Switch
 from snmp.forms import SwitchForm
 import logging
-from .qoshimcha import get_permitted_branches
+from .qoshimcha import get_permitted_branches, switch_list_queryset
 from .update_views import update_switch_status, update_switch_inventory
 
 
@@ -16,7 +16,7 @@ logger = logging.getLogger("ICMP RESPONSE")
 @login_required
 def switches(request):
     user_permitted_branches = get_permitted_branches(request.user)
-    items = Switch.objects.filter(branch__in=user_permitted_branches).order_by('-pk')
+    items = switch_list_queryset().filter(branch__in=user_permitted_branches).order_by('-pk')
     search_query = request.GET.get('search')
     if search_query:
         items = items.filter(
@@ -10,7 +10,7 @@ import logging
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.db import transaction
-from .qoshimcha import get_permitted_branches, convert_uptime_to_human_readable
+from .qoshimcha import get_permitted_branches, convert_uptime_to_human_readable, switch_list_queryset
 import time
 from ping3 import ping
 
@@ -85,7 +85,7 @@ def update_switch_ports_data(request, pk):
 @login_required
 def switches_offline(request):
     user_permitted_branches = get_permitted_branches(request.user)
-    switches_offline = Switch.objects.filter(status=False, branch__in=user_permitted_branches).order_by('ats')
+    switches_offline = switch_list_queryset().filter(status=False, branch__in=user_permitted_branches).order_by('ats')
     search_query = request.GET.get('search')
     if search_query:
         switches_offline = switches_offline.filter(
@@ -111,7 +111,7 @@ def switches_offline(request):
 @login_required
 def switches_high_sig_15(request):
     user_permitted_branches = get_permitted_branches(request.user)
-    switches_high_sig = Switch.objects.filter(
+    switches_high_sig = switch_list_queryset().filter(
         rx_signal__lte=-15, rx_signal__gt=-20, branch__in=user_permitted_branches
     ).order_by('rx_signal')
     search_query = request.GET.get('search')
@@ -139,7 +139,7 @@ def switches_high_sig_15(request):
 @login_required
 def switches_high_sig_10(request):
     user_permitted_branches = get_permitted_branches(request.user)
-    switches_high_sig = Switch.objects.filter(
+    switches_high_sig = switch_list_queryset().filter(
         rx_signal__lte=-11, rx_signal__gt=-15, branch__in=user_permitted_branches
     ).order_by('rx_signal')
     search_query = request.GET.get('search')
@@ -167,7 +167,7 @@ def switches_high_sig_10(request):
 @login_required
 def switches_high_sig(request):
     user_permitted_branches = get_permitted_branches(request.user)
-    switches_high_sig = Switch.objects.filter(rx_signal__lte=-20, branch__in=user_permitted_branches).order_by('rx_signal')
+    switches_high_sig = switch_list_queryset().filter(rx_signal__lte=-20, branch__in=user_permitted_branches).order_by('rx_signal')
     search_query = request.GET.get('search')
     if search_query:
         switches_high_sig = switches_high_sig.filter(
@@ -322,7 +322,7 @@ def update_switch_inventory(request, pk):
 @login_required
 def switches_high_sig_11(request):
     user_permitted_branches = get_permitted_branches(request.user)
-    switches_high_sig = Switch.objects.filter(
+    switches_high_sig = switch_list_queryset().filter(
         rx_signal__lte=-11, branch__in=user_permitted_branches
     ).order_by('rx_signal')
     search_query = request.GET.get('search')